@@ -1,6 +1,6 @@
 import os
 import sys
-from PySide6.QtCore import QTime, QUrl, Qt, QThread, Signal, QObject
+from PySide6.QtCore import QTime, QTimer, QUrl, Qt, QThread, Signal, QObject
 from PySide6.QtGui import QPixmap, QColor
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QDialog, QMessageBox, QStackedWidget,
     QGridLayout, QFileDialog, QVBoxLayout, QPushButton, QGroupBox, QLabel, QLineEdit, QFormLayout, QHBoxLayout, 
@@ -16,7 +16,9 @@ from UI.configs_content.configs_content_page import Ui_ConfigsContentPage
 
 from logic.project import Project
 from logic.topology_data import TopologyData
+from logic.topology_store import TopologyStore
 from logic.configurations import Configurations
+from logic.warmup import model_warmup
 
 from termcolor import cprint
 
@@ -110,7 +112,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.appData.imagePath = imageFile 
             
             # Attempt to load data
-            data = TopologyData().load_data_from_yaml(projectFolder)
+            data = TopologyStore().load_data_from_yaml(projectFolder)
             
             if data:
                 self.appData.data = data
@@ -169,7 +171,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # Save YAML Data
         if self.appData.data:
             try:
-                TopologyData().save_data_to_yaml(self.appData.data, self.appData.currentProjectPath)
+                TopologyStore().save_data_to_yaml(self.appData.data, self.appData.currentProjectPath)
                 QMessageBox.information(self, "Succès", "Données sauvegardées sur le disque.")
             except Exception as e:
                 print(f"Error saving YAML data: {e}")
@@ -547,7 +549,7 @@ class AfterExtraction(QWidget, Ui_AfterExtraction):
         """Generate configurations and move to the next page."""
         # Call save function
         try:
-            TopologyData().save_data_to_yaml(self.data, self.appData.currentProjectPath)
+            TopologyStore().save_data_to_yaml(self.data, self.appData.currentProjectPath)
             # QMessageBox.information(self, "Succès", "Variables sauvegardees avec succes")
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de la sauvegarde: {str(e)}")
@@ -663,7 +665,11 @@ class Worker(QObject):
     def run(self):
         def callback(msg):
              self.message.emit(msg)
-        
+
+        if not model_warmup.is_ready():
+            callback("Loading models...")
+            model_warmup.wait()
+
         self.appData.data = TopologyData().process(self.imagePath, self.currentProjectPath, status_callback=callback)
         self.appData.extracted = True
         self.finished.emit()
@@ -707,7 +713,11 @@ class AppData:
         self.data = None
 
 
-app = QApplication(sys.argv)
-main_window = MainWindow()
-main_window.show()
-sys.exit(app.exec())
\ No newline at end of file
+# The guard keeps the OCR worker processes (started with spawn) from opening the application again
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    main_window = MainWindow()
+    main_window.show()
+    # Preload the models once the window is on screen
+    QTimer.singleShot(0, model_warmup.start)
+    sys.exit(app.exec())
\ No newline at end of file
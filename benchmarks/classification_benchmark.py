@@ -0,0 +1,170 @@
+"""Benchmark et precision des classifieurs de texte sur network_architecture_dataset.csv
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.classification_benchmark [--classifiers rules bert bert-int8 cascade] [--output results.json]
+
+Pour chaque classifieur: precision et rappel par classe, debit (textes/s), latence p50/p99 d'un texte seul
+et pic memoire. Les resultats sont ecrits dans un fichier JSON pour suivre les regressions d'une version a l'autre.
+"""
+import argparse
+import csv
+import datetime
+import json
+import pathlib
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+from logic.text_classifier import BertClassifier, CascadeClassifier, RuleClassifier, NEURAL_TO_RULE_LABELS
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+DATASET = ROOT / "network_architecture_dataset.csv"
+BERT_MODEL = ROOT / "AI_models" / "bert-finetuned"
+
+# Classes du jeu de donnees exprimees avec les classes des classifieurs, les autres deviennent 'other'
+DATASET_LABELS = {
+    'hostname': 'hostname',
+    'interface': 'interface',
+    'ip address': 'ip',
+    'uncomplete_ip': 'incomplete_ip',
+    'vlan id': 'vlan',
+    'protocol': 'protocol',
+}
+
+
+def rules_classifier():
+    return RuleClassifier().classify
+
+
+def bert_classifier():
+    # No cache: every text goes through the model, as on a first extraction
+    classifier = BertClassifier(str(BERT_MODEL), cacheSize=0)
+    return lambda texts: [NEURAL_TO_RULE_LABELS.get(r['label'], r['label']) for r in classifier.classify(texts)]
+
+
+def bert_int8_classifier():
+    classifier = BertClassifier(str(BERT_MODEL), cacheSize=0, quantized=True)
+    return lambda texts: [NEURAL_TO_RULE_LABELS.get(r['label'], r['label']) for r in classifier.classify(texts)]
+
+
+def cascade_classifier():
+    # BERT is loaded here: without it the cascade would silently measure the rules alone, the row is skipped instead
+    neural = BertClassifier(str(BERT_MODEL), cacheSize=0)
+    classifier = CascadeClassifier(lambda: neural)
+    return classifier.classify
+
+
+# Classifieurs disponibles: nom -> fonction qui cree une fonction de classification d'une liste de textes
+CLASSIFIERS = {
+    'rules': rules_classifier,
+    'bert': bert_classifier,
+    'bert-int8': bert_int8_classifier,
+    'cascade': cascade_classifier,
+}
+
+
+def load_dataset(path=DATASET):
+    with open(path, newline='', encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    texts = [row['text'] for row in rows]
+    labels = [DATASET_LABELS.get(row['label'], 'other') for row in rows]
+    return texts, labels
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def per_class_metrics(expected, predicted):
+    """Precision et rappel pour chaque classe"""
+    metrics = {}
+    for label in sorted(set(expected) | set(predicted)):
+        truePositives = sum(1 for e, p in zip(expected, predicted) if e == label and p == label)
+        predictedCount = predicted.count(label)
+        expectedCount = expected.count(label)
+        metrics[label] = {
+            'precision': truePositives / predictedCount if predictedCount else 0.0,
+            'recall': truePositives / expectedCount if expectedCount else 0.0,
+            'support': expectedCount,
+        }
+    return metrics
+
+
+def benchmark(name, factory, texts, labels, latencySamples):
+    """Mesure un classifieur: creation, classification de toute la liste, puis latence texte par texte
+
+    Le pic memoire est mesure a part, sur une nouvelle instance: tracemalloc ralentit l'execution."""
+    start = time.perf_counter()
+    classify = factory()
+    loadTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = classify(texts)
+    elapsed = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[:latencySamples]:
+        start = time.perf_counter()
+        classify([text])
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    factory()(texts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'classifier': name,
+        'strings': len(texts),
+        'accuracy': sum(1 for e, p in zip(labels, predicted) if e == p) / len(texts),
+        'per_class': per_class_metrics(labels, predicted),
+        'load_seconds': loadTime,
+        'strings_per_second': len(texts) / elapsed if elapsed else float('inf'),
+        'latency_p50_ms': percentile(latencies, 50) * 1000,
+        'latency_p99_ms': percentile(latencies, 99) * 1000,
+        'peak_python_memory_mb': peak / 1024 ** 2,
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--classifiers", nargs="+", default=list(CLASSIFIERS), choices=list(CLASSIFIERS))
+    parser.add_argument("--latency-samples", type=int, default=500, help="number of texts classified one by one")
+    parser.add_argument("--output", default="classification_benchmark.json")
+    args = parser.parse_args()
+
+    texts, labels = load_dataset()
+    results = []
+    for name in args.classifiers:
+        try:
+            result = benchmark(name, CLASSIFIERS[name], texts, labels, args.latency_samples)
+        except Exception as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        results.append(result)
+        print(f"{name:8s} accuracy {result['accuracy']:.3f}  {result['strings_per_second']:10.0f} strings/s  "
+              f"p50 {result['latency_p50_ms']:.3f} ms  p99 {result['latency_p99_ms']:.3f} ms  "
+              f"peak {result['peak_python_memory_mb']:.1f} MB")
+        for label, metrics in result['per_class'].items():
+            print(f"    {label:14s} precision {metrics['precision']:.3f}  recall {metrics['recall']:.3f}  ({metrics['support']})")
+
+    report = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'dataset': DATASET.name,
+        'results': results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
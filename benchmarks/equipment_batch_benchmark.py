@@ -0,0 +1,68 @@
+"""Classification des equipements par lots contre zone par zone, sur de vrais schemas
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.equipment_batch_benchmark --images dossier/des/schemas [--batch 16]
+
+Pour chaque schema, les zones d'equipements sont detectees une fois, puis classees zone par zone (le chemin
+par defaut, EQUIPMENT_BATCH_SIZE = 1) et par lots de `--batch` zones. Les classes doivent etre identiques avant
+d'augmenter EQUIPMENT_BATCH_SIZE: le script se termine en erreur si une zone change de classe.
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+from logic.topology_data import EQUIPMENT_MODEL, ZONES_MODEL, TopologyData
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp"}
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def compare(data, image, batchSize):
+    """Classes zone par zone et par lots des zones d'un schema: (zones, differences, temps par zone, temps par lots)"""
+    data.imagePath = str(image)
+    data.detect_zones(ZONES_MODEL)
+    zones = data.detected_equipments_zones
+
+    # The first call of the model (warm-up) is not measured
+    data.run_equipment_detection(EQUIPMENT_MODEL, dict(list(zones.items())[:1]), 1)
+
+    perCrop, perCropTime = timed(lambda: data.run_equipment_detection(EQUIPMENT_MODEL, zones, 1))
+    batched, batchedTime = timed(lambda: data.run_equipment_detection(EQUIPMENT_MODEL, zones, batchSize))
+    differences = {index: (perCrop[index], batched[index]) for index in zones if perCrop[index] != batched[index]}
+    return len(zones), differences, perCropTime, batchedTime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", required=True, help="folder of diagrams")
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+
+    images = sorted(p for p in pathlib.Path(args.images).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    data = TopologyData()
+    # Both paths are measured: nothing is read from the inference cache
+    data.useInferenceCache = False
+
+    mismatches = 0
+    for image in images:
+        zones, differences, perCropTime, batchedTime = compare(data, image, args.batch)
+        mismatches += len(differences)
+        print(f"{image.name}: {zones} zones, per crop {perCropTime * 1000:.1f} ms, "
+              f"batches of {args.batch} {batchedTime * 1000:.1f} ms, {len(differences)} different classes")
+        for index, (perCrop, batched) in differences.items():
+            print(f"    zone {index}: per crop {perCrop!r}, batched {batched!r}")
+
+    if mismatches:
+        print(f"{mismatches} zones classified differently: keep EQUIPMENT_BATCH_SIZE = 1")
+        sys.exit(1)
+    print(f"Same classes on {len(images)} diagrams")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Association zones-liens: recherche exhaustive (Shapely, zone x lien) contre l'index spatial et le noyau NumPy
+
+Genere un schema synthetique (zones d'equipements, liens partant de leurs bords), verifie que les
+resultats sont identiques et compare les temps.
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.link_association_benchmark [--zones 500] [--links 700] [--seed 0]
+"""
+import argparse
+import random
+import time
+
+from shapely.geometry import LineString, Polygon
+from shapely.ops import nearest_points
+
+import numpy as np
+
+from logic.geometry import box_rectangles
+from logic.link_index import LinkIndex
+
+
+def box_points(box):
+    """(x, y, w, h) -> quatre points, comme TopologyData.convert_width_height_to_points"""
+    (x, y, w, h) = box
+    x1 = x - w/2
+    y1 = y - h/2
+    return ((x1, y1), (x1, y1 + h), (x1 + w, y1 + h), (x1 + w, y1))
+
+
+def synthetic_diagram(zoneCount, linkCount, seed, size=8000):
+    """Zones aleatoires et liens (coordonnees entieres, comme add_link) allant du bord d'une zone a une autre"""
+    rng = random.Random(seed)
+    zones = {index: {'box': (rng.randint(0, size), rng.randint(0, size), rng.randint(40, 120), rng.randint(40, 120))}
+             for index in range(1, zoneCount + 1)}
+    boxes = [zone['box'] for zone in zones.values()]
+
+    links = {}
+    for index in range(1, linkCount + 1):
+        (xa, ya, _, ha), (xb, yb, _, hb) = rng.sample(boxes, 2)
+        pt1 = (int(xa), int(ya - ha/2) + rng.choice((-1, 0, 1, 3)))
+        pt2 = (int(xb), int(yb + hb/2) + rng.choice((-1, 0, 1)))
+        links[index] = {'points': tuple(sorted((pt1, pt2), key=lambda p: p[1])), 'box': None}
+    return zones, links
+
+
+def exhaustive_within(links, box, maxDistance=2):
+    """Recherche sans index: tous les liens sont mesures pour chaque zone"""
+    boundary = Polygon(box).boundary
+    closests = []
+    for index in links:
+        pointOnBoundary, pointOnLink = nearest_points(boundary, LineString(links[index]['points']))
+        distance = pointOnBoundary.distance(pointOnLink)
+        if distance < maxDistance:
+            closests.append((index, distance))
+    return closests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--zones", type=int, default=500)
+    parser.add_argument("--links", type=int, default=700)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    zones, links = synthetic_diagram(args.zones, args.links, args.seed)
+    boxes = [box_points(zone['box']) for zone in zones.values()]
+
+    start = time.perf_counter()
+    expected = [exhaustive_within(links, box) for box in boxes]
+    exhaustive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = LinkIndex(links)
+    built = time.perf_counter() - start
+    found = [index.within(Polygon(box).boundary, links.keys(), 2) for box in boxes]
+    indexed = time.perf_counter() - start
+
+    # Every zone against every link in one call, as link_equipments
+    start = time.perf_counter()
+    distances = index.rectangle_distances(box_rectangles([zone['box'] for zone in zones.values()]))
+    matrix = [[(index.ids[row], float(distances[row, column])) for row in np.flatnonzero(distances[:, column] < 2)]
+              for column in range(len(zones))]
+    vectorized = time.perf_counter() - start
+
+    print(f"{args.zones} zones x {args.links} links, {sum(map(len, expected))} zone-link contacts")
+    print(f"exhaustive: {exhaustive * 1000:.1f}ms")
+    print(f"indexed:    {indexed * 1000:.1f}ms (index built in {built * 1000:.1f}ms), x{exhaustive / indexed:.0f}")
+    print(f"matrix:     {vectorized * 1000:.1f}ms, x{exhaustive / vectorized:.0f}")
+    print(f"identical:  {found == expected and matrix == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Rapport precision / vitesse du profil 'quantized' (INT8) par rapport aux modeles fp32
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.quantization_report --images dossier/des/schemas [--output quantization_report.json]
+
+Modeles YOLO: les detections INT8 sont comparees a celles du modele fp32 (meme classe et IoU >= 0.5),
+avec la latence moyenne par image. Modele BERT: precision et debit sur network_architecture_dataset.csv.
+Les images d'evaluation devraient etre differentes des images de calibration.
+"""
+import argparse
+import json
+import pathlib
+import time
+
+from benchmarks.classification_benchmark import CLASSIFIERS, benchmark, load_dataset
+from logic.model_registry import model_registry
+from logic.quantization import CALIBRATION_DIRECTORY, calibration_images, load_quantized_yolo
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+MODELS = {
+    'zones': "zones_detection_x.pt",
+    'links': "links_detection.pt",
+    'equipment': "detect_equipment.pt",
+}
+IOU_THRESHOLD = 0.5
+
+
+def detections(result):
+    """[(classe, (x1, y1, x2, y2)), ...] pour les boites classiques et orientees (OBB)"""
+    boxes = result.obb if result.obb is not None else result.boxes
+    return [(int(cls), tuple(box.tolist())) for cls, box in zip(boxes.cls, boxes.xyxy)]
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def matched_detections(reference, candidate):
+    """Nombre de detections de reference retrouvees (meme classe, IoU suffisant), chacune une seule fois"""
+    remaining = list(candidate)
+    matched = 0
+    for cls, box in reference:
+        best = max((c for c in remaining if c[0] == cls), key=lambda c: iou(box, c[1]), default=None)
+        if best is not None and iou(box, best[1]) >= IOU_THRESHOLD:
+            remaining.remove(best)
+            matched += 1
+    return matched
+
+
+def timed_predict(model, image):
+    start = time.perf_counter()
+    result = model.predict(str(image), verbose=False)[0]
+    return result, time.perf_counter() - start
+
+
+def compare_yolo(name, modelFile, images):
+    from ultralytics import YOLO
+
+    modelPath = ROOT / "AI_models" / modelFile
+    fp32 = YOLO(str(modelPath))
+    int8 = load_quantized_yolo(modelPath, model_registry.file_digest(modelPath))
+
+    totals = {'fp32_detections': 0, 'int8_detections': 0, 'matched': 0, 'fp32_seconds': 0.0, 'int8_seconds': 0.0}
+    for image in images:
+        reference, fp32Time = timed_predict(fp32, image)
+        candidate, int8Time = timed_predict(int8, image)
+        reference, candidate = detections(reference), detections(candidate)
+
+        totals['fp32_detections'] += len(reference)
+        totals['int8_detections'] += len(candidate)
+        totals['matched'] += matched_detections(reference, candidate)
+        totals['fp32_seconds'] += fp32Time
+        totals['int8_seconds'] += int8Time
+
+    return {
+        'model': name,
+        'images': len(images),
+        'recall_vs_fp32': totals['matched'] / totals['fp32_detections'] if totals['fp32_detections'] else 1.0,
+        'precision_vs_fp32': totals['matched'] / totals['int8_detections'] if totals['int8_detections'] else 1.0,
+        'fp32_ms_per_image': totals['fp32_seconds'] / len(images) * 1000,
+        'int8_ms_per_image': totals['int8_seconds'] / len(images) * 1000,
+        'speedup': totals['fp32_seconds'] / totals['int8_seconds'] if totals['int8_seconds'] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", default=str(CALIBRATION_DIRECTORY), help="evaluation diagrams")
+    parser.add_argument("--output", default="quantization_report.json")
+    args = parser.parse_args()
+
+    images = calibration_images(args.images, limit=None)
+    report = {'yolo': [], 'bert': []}
+
+    if images:
+        for name, modelFile in MODELS.items():
+            result = compare_yolo(name, modelFile, images)
+            report['yolo'].append(result)
+            print(f"{name:10s} recall {result['recall_vs_fp32']:.3f}  precision {result['precision_vs_fp32']:.3f}  "
+                  f"fp32 {result['fp32_ms_per_image']:.1f} ms  int8 {result['int8_ms_per_image']:.1f} ms")
+    else:
+        print(f"No images in {args.images}: YOLO comparison skipped")
+
+    texts, labels = load_dataset()
+    for name in ('bert', 'bert-int8'):
+        result = benchmark(name, CLASSIFIERS[name], texts, labels, latencySamples=200)
+        report['bert'].append(result)
+        print(f"{name:10s} accuracy {result['accuracy']:.3f}  {result['strings_per_second']:.0f} strings/s  "
+              f"p50 {result['latency_p50_ms']:.2f} ms")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
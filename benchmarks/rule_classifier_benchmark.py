@@ -0,0 +1,193 @@
+"""Micro-benchmark du classifieur par regles sur network_architecture_dataset.csv
+
+Compare RuleClassifier a une copie figee des predicats de TopologyData qu'il remplace:
+memes classes sur le jeu de donnees et sur des chaines aleatoires, et gain de temps.
+
+Usage (depuis la racine du projet):
+    python -m benchmarks.rule_classifier_benchmark [--repeat 20] [--random 50000]
+"""
+import argparse
+import csv
+import ipaddress
+import pathlib
+import random
+import re
+import time
+
+from logic.text_classifier import RuleClassifier
+
+DATASET = pathlib.Path(__file__).resolve().parent.parent / "network_architecture_dataset.csv"
+# Caracteres des chaines aleatoires: ceux des textes de schemas reseau
+RANDOM_ALPHABET = "0123456789./-_ abcdefgiloprstvAEFGLOPSTV"
+
+
+class LegacyRules:
+    """Predicats de TopologyData avant RuleClassifier, recopies tels quels (expressions compilees a chaque appel)"""
+
+    def normalise_interfaces_names(self, text):
+        substitutions = {
+            r'(?i)^(?:GigabitEthernet|Gig|Gi|g)([\doO]+(?:/[\doO]+){1,2})$': r'GigabitEthernet\1',
+            r'(?i)^(?:FastEthernet|FastEth|Fa|fo|f)([\doO]+(?:/[\doO]+){1,2})$': r'FastEthernet\1',
+            r'(?i)^(?:TenGigabitEthernet|TenGig|Te)([\doO]+(?:/[\doO]+){1,2})$': r'TenGigabitEthernet\1',
+            r'(?i)^(?:Ethernet|Eth|e)([\doO]+(?:/[\doO]+){0,2})$': r'Ethernet\1',
+            r'(?i)^(?:Serial|Se|s)([\doO]+(?:/[\doO]+){1,3})$': r'Serial\1',
+            r'(?i)^(?:Loopback|Lo)([\doO]+)$': r'Loopback\1',
+            r'(?i)^(?:Vlan|Vl|v)([\doO]+)$': r'Vlan\1',
+            r'(?i)^(?:Port-channel|Po)([\doO]+)$': r'Port-channel\1',
+        }
+
+        for pattern, replacement in substitutions.items():
+            match = re.match(pattern, text)
+            if match:
+                numeric_part = match.group(1)
+                cleaned_numeric = numeric_part.replace('o', '0').replace('O', '0')
+                prefix = replacement.replace(r'\1', '')
+                return prefix + cleaned_numeric
+        return text
+
+    def is_interface(self, text):
+        normalText = self.normalise_interfaces_names(text)
+        validPatterns = [
+            r'^GigabitEthernet\s?\d+(/\d+){1,2}$',
+            r'^FastEthernet\s?\d+(/\d+){1,2}$',
+            r'^Serial\s?\d+(/\d+){1,3}$',
+            r'^Loopback\d+$',
+            r'^Ethernet\s?\d+(/\d+){0,2}$',
+            r'^Port-channel\s?\d+$',
+            r'^TenGigabitEthernet\s?\d+(/\d+){1,2}$'
+        ]
+        return any(re.match(pattern, normalText) for pattern in validPatterns)
+
+    def is_hostname(self, text):
+        if text.isdigit():
+            return False
+        pattern = r'^[a-zA-Z0-9]([a-zA-Z0-9\-\_]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-\_]{0,61}[a-zA-Z0-9])?)*$'
+        return bool(re.match(pattern, text))
+
+    def is_protocol(self, text):
+        protocols = [
+            'OSPF', 'BGP', 'EIGRP', 'RIP', 'ISIS', 'HSRP', 'VRRP', 'GLBP',
+            'STP', 'RSTP', 'MSTP', 'LACP', 'PAgP', 'DHCP', 'DNS', 'NTP',
+            'SNMP', 'SSH', 'Telnet', 'HTTP', 'HTTPS', 'FTP', 'TFTP', 'ICMP',
+            'TCP', 'UDP', 'GRE', 'IPsec', 'MPLS', 'LDP'
+        ]
+        return text.upper() in protocols
+
+    def is_vlan(self, text):
+        pattern = r'^(VLAN\s?)?\d{1,4}$'
+        return bool(re.match(pattern, text, re.IGNORECASE))
+
+    def is_incomplete_ip(self, text):
+        p1 = r'^\.(\d{1,3})(\.\d{1,3})*(/(3[0-2]|[12]?[0-9]))?$'
+        p2 = r'^(\d{1,3}\.)+\d{1,3}(/(3[0-2]|[12]?[0-9]))?$'
+        p3 = r'^\d{1,3}$'
+
+        if re.match(p1, text) or re.match(p3, text):
+            return True
+        if re.match(p2, text):
+            if text.count('.') == 3:
+                return False
+            return True
+        return False
+
+    def is_ip(self, text):
+        patterns = [
+            r'\b(?:\d{1,3}\.){1,3}\d{1,3}\b',
+            r'\b(?:\.\d{1,3}\.){1,2}\d{1,3}\b',
+            r'\b(?:\.\d{1,3})'
+        ]
+        validIPPatterns = re.compile('|'.join(patterns))
+        return validIPPatterns.fullmatch(text)
+
+    def is_ip_with_mask(self, text):
+        try:
+            ipaddress.IPv4Network(text, strict=False)
+            return True
+        except ValueError:
+            return False
+
+    def classify_text(self, texts):
+        if isinstance(texts, list):
+            result = []
+            for index, text in enumerate(texts):
+                if self.is_interface(text): result.append((index, 'interface'))
+                elif self.is_hostname(text): result.append((index, 'hostname'))
+                elif self.is_protocol(text): result.append((index, 'protocol'))
+                elif self.is_incomplete_ip(text): result.append((index, 'incomplete_ip'))
+                elif self.is_vlan(text): result.append((index, 'vlan'))
+                elif self.is_ip(text): result.append((index, 'ip'))
+                elif self.is_ip_with_mask(text): result.append((index, 'ip'))
+                else: result.append((index, 'other'))
+            return result
+
+        text = texts
+        if self.is_hostname(text): return "hostname"
+        elif self.is_protocol(text): return "protocol"
+        elif self.is_incomplete_ip(text): return "incomplete_ip"
+        elif self.is_vlan(text): return "vlan"
+        elif self.is_ip(text): return "ip"
+        elif self.is_ip_with_mask(text): return "ip"
+        elif self.is_interface(text): return "interface"
+        else: return "other"
+
+
+def load_texts(path=DATASET):
+    with open(path, newline='', encoding="utf-8") as f:
+        return [row['text'] for row in csv.DictReader(f)]
+
+
+def random_texts(count, seed=0):
+    generator = random.Random(seed)
+    return ["".join(generator.choices(RANDOM_ALPHABET, k=generator.randint(1, 12))) for _ in range(count)]
+
+
+def timed(function, repeat):
+    """Meilleur temps sur `repeat` executions"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_labels(legacy, classifier, texts):
+    """Memes classes que les anciens predicats, pour une liste et pour des textes isoles"""
+    expected = [label for _, label in legacy.classify_text(texts)]
+    assert classifier.classify(texts) == expected, "list labels differ from the legacy rules"
+    for text in texts:
+        assert classifier.classify_one(text) == legacy.classify_text(text), f"label of {text!r} differs from the legacy rules"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--random", type=int, default=50000, help="random strings checked against the legacy rules")
+    args = parser.parse_args()
+
+    texts = load_texts()
+    legacy = LegacyRules()
+    classifier = RuleClassifier()
+
+    check_labels(legacy, classifier, texts)
+    check_labels(legacy, classifier, random_texts(args.random))
+    print(f"Labels identical to the legacy rules on {len(texts)} dataset strings and {args.random} random strings")
+
+    # Legacy predicates, one string at a time
+    legacyTime = timed(lambda: legacy.classify_text(texts), args.repeat)
+    # Compiled rules, one label per string
+    perString = timed(lambda: [classifier.label(text) for text in texts], args.repeat)
+    # Whole list in one pass, each distinct string evaluated once
+    singlePass = timed(lambda: classifier.classify(texts), args.repeat)
+
+    print(f"{len(texts)} strings, best of {args.repeat}")
+    print(f"legacy      : {legacyTime * 1000:8.2f} ms  ({len(texts) / legacyTime:10.0f} strings/s)")
+    print(f"per string  : {perString * 1000:8.2f} ms  ({len(texts) / perString:10.0f} strings/s)")
+    print(f"single pass : {singlePass * 1000:8.2f} ms  ({len(texts) / singlePass:10.0f} strings/s)")
+    print(f"speedup     : {legacyTime / singlePass:8.1f}x")
+
+    assert singlePass < legacyTime, "the single pass is not faster than the legacy rules"
+
+
+if __name__ == "__main__":
+    main()
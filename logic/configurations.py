@@ -8,12 +8,21 @@ import ipaddress
 
 from termcolor import cprint
 
+from logic.topology_graph import TopologyGraph
+
+# Complete les host_vars avec le voisin de chaque interface ('description Link to ...' de router.j2 et switch.j2)
+# et la passerelle des PC (pc.j2), deduits des sous-reseaux des interfaces et non des liens extraits.
+# Desactive par defaut: les configurations generees restent celles d'avant.
+TOPOLOGY_HINTS = False
+
 class Configurations:
     """Gestion des configurations"""
     def __init__(self, projectFolder, data):
         self.devices = []  # List of devices with their details
         self.projectFolder = projectFolder
         self.data = data
+        self._graph = None
+        self.topologyHints = TOPOLOGY_HINTS
         self.load_devices()
 
     def load_devices(self):
@@ -49,6 +58,44 @@ class Configurations:
             except Exception as e:
                 print(f"Error loading {yaml_file}: {e}")
 
+    @property
+    def graph(self):
+        """Graphe des equipements, les liens etant deduits des sous-reseaux de leurs interfaces (construit au premier acces)
+
+        Des host_vars mal formes ne bloquent pas la generation des configurations: le graphe est alors vide."""
+        if self._graph is None:
+            try:
+                self._graph = TopologyGraph.from_nodes({device['hostname']: device['variables'] for device in self.devices})
+            except Exception as e:
+                cprint(f"Topology graph unavailable: {e}", 'yellow')
+                self._graph = TopologyGraph([], [], [])
+        return self._graph
+
+    def interface_neighbor(self, hostname, interfaceName):
+        """Nom d'hote des equipements du meme sous-reseau que l'interface, None si ils ne sont pas connus
+
+        Les voisins sont deduits des adresses (les host_vars ne contiennent pas les liens): un sous-reseau partage
+        par plusieurs equipements les donne tous."""
+        graph = self.graph
+        node = graph.node(hostname)
+        port = graph.find_port(node, interfaceName) if node is not None else None
+        if port is None:
+            return None
+        peers = dict.fromkeys(graph.hostname(graph.port_node(peer)) for peer in graph.subnet_peers(port))
+        return ", ".join(peer for peer in peers if peer and peer != hostname) or None
+
+    def gateway(self, hostname):
+        """Adresse de l'interface de routeur dans le sous-reseau de l'equipement, None si il n'y en a pas"""
+        graph = self.graph
+        node = graph.node(hostname)
+        if node is None:
+            return None
+        for port in graph.ports(node):
+            for peer in graph.subnet_peers(port):
+                if graph.device(graph.port_node(peer)) == 'router':
+                    return str(ipaddress.ip_interface(graph.port_address(peer)).ip)
+        return None
+
     def generate_configurations(self, status_callback=None, progress_callback=None):
         """Generate configurations with Ansible"""
         if not self.devices:
@@ -107,6 +154,17 @@ class Configurations:
                 host_vars['interfaces'] = interfaces_list
             elif 'interfaces' not in host_vars:
                 host_vars['interfaces'] = []
+            else:
+                # Copies: the interfaces of the loaded devices are not modified
+                host_vars['interfaces'] = [dict(iface) if isinstance(iface, dict) else iface for iface in host_vars['interfaces']]
+
+            # Description of the links (router.j2, switch.j2), only when the topology hints are enabled
+            if self.topologyHints:
+                for iface in host_vars['interfaces']:
+                    if isinstance(iface, dict) and 'neighbor' not in iface:
+                        neighbor = self.interface_neighbor(hostname, iface.get('name'))
+                        if neighbor:
+                            iface['neighbor'] = neighbor
 
             # Special handling for PCs: ensure robust IP handling
             if device_type == 'pc':
@@ -136,6 +194,12 @@ class Configurations:
                             'name': 'eth0',
                             'ip': ip_cidr
                         })
+
+                # Default gateway (pc.j2): the router interface of the PC subnet, only with the topology hints
+                if self.topologyHints and 'gateway' not in host_vars:
+                    gateway = self.gateway(hostname)
+                    if gateway:
+                        host_vars['gateway'] = gateway
             
             # Write host_vars to file
             host_var_path = os.path.join(host_vars_dir, f"{hostname}.yml")
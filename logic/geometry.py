@@ -0,0 +1,94 @@
+import numpy as np
+
+
+# Nombre maximal de paires segment x rectangle calculees a la fois (memoire des tableaux intermediaires)
+DISTANCE_CHUNK_PAIRS = 1_000_000
+
+
+def box_rectangles(boxes):
+    """Boxes (x, y, w, h) centrees -> rectangles (xmin, ymin, xmax, ymax), comme convert_width_height_to_points"""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    x, y, w, h = boxes.T
+    xmin = x - w/2
+    ymin = y - h/2
+    return np.stack((xmin, ymin, xmin + w, ymin + h), axis=1)
+
+
+def points_rectangle(points):
+    """Rectangle (xmin, ymin, xmax, ymax) d'un quadrilatere a cotes horizontaux et verticaux, None si il est incline"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    xs, ys = points[:, 0], points[:, 1]
+    xmin, xmax, ymin, ymax = xs.min(), xs.max(), ys.min(), ys.max()
+    # Every corner lies on a vertical and on a horizontal side
+    onSides = (np.isin(xs, (xmin, xmax)) & np.isin(ys, (ymin, ymax))).all()
+    if len(points) != 4 or not onSides:
+        return None
+    return np.array((xmin, ymin, xmax, ymax))
+
+
+def point_boundary_distances(px, py, xmin, ymin, xmax, ymax):
+    """Distances entre des points et le contour de rectangles (tableaux diffusables les uns avec les autres)"""
+    # Outside: distance to the rectangle, inside: distance to the closest side
+    dx = np.maximum(np.maximum(xmin - px, px - xmax), 0)
+    dy = np.maximum(np.maximum(ymin - py, py - ymax), 0)
+    outside = np.sqrt(dx * dx + dy * dy)
+    inside = np.minimum(np.minimum(px - xmin, xmax - px), np.minimum(py - ymin, ymax - py))
+    return np.where((dx > 0) | (dy > 0), outside, np.maximum(inside, 0))
+
+
+def segment_rectangle_distances(segments, rectangles):
+    """Matrice (S, R) des distances entre des segments (S, 2, 2) et le contour de rectangles (R, 4) (xmin, ymin, xmax, ymax)
+
+    Distance nulle si le segment touche ou traverse le contour. Sinon la distance la plus courte est atteinte
+    a une extremite du segment (distance au contour) ou a un coin du rectangle (distance au segment)."""
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+    rectangles = np.asarray(rectangles, dtype=np.float64).reshape(-1, 4)
+    distances = np.empty((len(segments), len(rectangles)))
+    if not distances.size:
+        return distances
+
+    step = max(1, DISTANCE_CHUNK_PAIRS // len(rectangles))
+    for start in range(0, len(segments), step):
+        distances[start:start + step] = segment_rectangle_chunk(segments[start:start + step], rectangles)
+    return distances
+
+
+def segment_rectangle_chunk(segments, rectangles):
+    # Segments as columns (S, 1), rectangles as rows (1, R)
+    ax, ay, bx, by = (segments[:, i, j, np.newaxis] for i, j in ((0, 0), (0, 1), (1, 0), (1, 1)))
+    xmin, ymin, xmax, ymax = (rectangles[np.newaxis, :, i] for i in range(4))
+
+    # Extremities of the segments against the sides of the rectangles
+    distances = np.minimum(point_boundary_distances(ax, ay, xmin, ymin, xmax, ymax),
+                           point_boundary_distances(bx, by, xmin, ymin, xmax, ymax))
+
+    # Corners of the rectangles against the segments (closest point of the segment to the corner)
+    ux, uy = bx - ax, by - ay
+    length = ux * ux + uy * uy
+    length = np.where(length > 0, length, 1)
+    cornerDistance = None
+    allLeft = allRight = None
+    for cx, cy in ((xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)):
+        vx, vy = cx - ax, cy - ay
+        t = np.clip((vx * ux + vy * uy) / length, 0, 1)
+        # Same rounding as the nearest points of Shapely: the point of the segment is computed first
+        ex, ey = cx - (ax + t * ux), cy - (ay + t * uy)
+        squared = ex * ex + ey * ey
+        cornerDistance = squared if cornerDistance is None else np.minimum(cornerDistance, squared)
+
+        # Side of the corner relative to the line of the segment
+        side = ux * vy - uy * vx
+        allLeft = side > 0 if allLeft is None else allLeft & (side > 0)
+        allRight = side < 0 if allRight is None else allRight & (side < 0)
+    distances = np.minimum(distances, np.sqrt(cornerDistance))
+
+    # Separating axes: x, y and the normal of the segment
+    separated = ((np.maximum(ax, bx) < xmin) | (np.minimum(ax, bx) > xmax)
+                 | (np.maximum(ay, by) < ymin) | (np.minimum(ay, by) > ymax) | allLeft | allRight)
+
+    # A segment meeting the rectangle touches its contour, unless it lies strictly inside
+    strictlyInside = ((np.minimum(ax, bx) > xmin) & (np.maximum(ax, bx) < xmax)
+                      & (np.minimum(ay, by) > ymin) & (np.maximum(ay, by) < ymax))
+
+    return np.where(separated | strictlyInside, distances, 0.0)
+
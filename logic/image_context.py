@@ -0,0 +1,56 @@
+import threading
+
+import cv2
+
+
+def crop_box(image, box):
+    """Vue (sans copie) sur la zone (x, y, w, h) de l'image, rognee comme les zones detectees par YOLO"""
+    (x, y, w, h) = box
+    xOrigin = x - w/2
+    yOrigin = y - h/2
+    return image[int(yOrigin) : int(y+h), int(xOrigin) : int(x+w)]
+
+
+class ImageContext:
+    """Image du schema decodee une seule fois pour toutes les etapes de l'extraction
+
+    Les etapes recoivent le tableau numpy (YOLO l'accepte directement) et des vues sans copie sur les zones.
+    Les images derivees (niveaux de gris) sont calculees a la premiere demande puis gardees."""
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self._image = None
+        self._gray = None
+
+    @property
+    def image(self):
+        """Image BGR decodee au premier acces"""
+        with self.lock:
+            if self._image is None:
+                image = cv2.imread(self.path)
+                if image is None:
+                    raise ValueError(f"Image could not be read: {self.path}")
+                self._image = image
+            return self._image
+
+    @property
+    def gray(self):
+        """Image en niveaux de gris, calculee une seule fois"""
+        image = self.image
+        with self.lock:
+            if self._gray is None:
+                self._gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            return self._gray
+
+    def owns(self, image):
+        """L'image est celle du contexte (et non une copie ou une zone)"""
+        return image is not None and image is self._image
+
+    def roi(self, box, gray=False):
+        """Vue (sans copie) sur la zone (x, y, w, h) de l'image ou de ses niveaux de gris"""
+        return crop_box(self.gray if gray else self.image, box)
+
+    def release(self):
+        with self.lock:
+            self._image = None
+            self._gray = None
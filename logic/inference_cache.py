@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import pathlib
+import pickle
+import threading
+
+from termcolor import cprint
+
+
+# Cache sur disque des sorties brutes des etapes d'extraction (zones, liens, equipements, texte OCR)
+INFERENCE_CACHE_DIRECTORY = pathlib.Path(".") / "cache" / "inference"
+# Taille maximale du cache (en octets): au-dela, les entrees les moins recemment utilisees sont supprimees
+INFERENCE_CACHE_SIZE = 512 * 1024 ** 2
+
+
+class InferenceCache:
+    """Cache adresse par contenu des sorties des etapes d'inference
+
+    La cle d'une entree est construite a partir de l'empreinte de l'image, de celle du modele et des parametres
+    de l'etape: une nouvelle execution sur la meme image saute directement aux etapes de geometrie et de texte.
+    """
+    def __init__(self, directory=INFERENCE_CACHE_DIRECTORY, maxSize=INFERENCE_CACHE_SIZE):
+        self.directory = pathlib.Path(directory)
+        self.maxSize = maxSize
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, stage, imageDigest, modelDigest, params=None):
+        content = json.dumps([stage, imageDigest, modelDigest, params], sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def path(self, key):
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def get(self, key):
+        """Valeur gardee pour la cle, None si elle n'est pas dans le cache"""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # Corrupted or incompatible entry: drop it and compute again
+            cprint(f"Inference cache entry ignored: {e}", 'yellow')
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        # The modification time records the last use (LRU eviction)
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename: a concurrent reader never sees a partial file
+        temporary = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temporary, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+        self.evict()
+
+    def evict(self):
+        """Supprime les entrees les moins recemment utilisees tant que la taille du cache depasse le maximum"""
+        with self.lock:
+            entries = []
+            for path in self.directory.glob("*/*.pkl"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.maxSize:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def clear(self):
+        with self.lock:
+            for path in self.directory.glob("*/*.pkl"):
+                path.unlink(missing_ok=True)
+
+    def report(self):
+        cprint(f"Inference cache: {self.hits} hits, {self.misses} misses", 'cyan')
+
+
+# Cache partage par tout le processus
+inference_cache = InferenceCache()
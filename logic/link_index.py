@@ -0,0 +1,156 @@
+import numpy as np
+import shapely
+from shapely.geometry import LineString
+from shapely.ops import nearest_points
+
+from logic.geometry import box_rectangles, segment_rectangle_distances
+
+
+# Marge ajoutee aux requetes de l'index: les distances des candidats sont ensuite recalculees exactement
+INDEX_TOLERANCE = 1e-6
+
+
+def boundary_distance(boundary, line):
+    """Distance entre le contour d'une zone et un lien, calculee par les points les plus proches"""
+    pointOnBoundary, pointOnLink = nearest_points(boundary, line)
+    return pointOnBoundary.distance(pointOnLink)
+
+
+class LinkIndex:
+    """Index spatial (STRtree) des liens detectes
+
+    Les lignes des liens sont construites une seule fois apres la detection. L'index selectionne les quelques
+    liens candidats, dont la distance est ensuite calculee comme sans index: les resultats sont identiques.
+    Pour les zones rectangulaires (cotes horizontaux et verticaux), les distances sont calculees d'un coup
+    pour tous les liens par le noyau NumPy de logic/geometry.py.
+    """
+    def __init__(self, links):
+        self.links = links
+        self.ids = list(links)
+        self.positions = {id: position for position, id in enumerate(self.ids)}
+        self.lines = np.array([LineString(links[id]['points']) for id in self.ids], dtype=object)
+        self.tree = shapely.STRtree(self.lines)
+        self.segments = np.array([links[id]['points'] for id in self.ids], dtype=np.float64).reshape(-1, 2, 2)
+
+    def is_stale(self, links):
+        return links is not self.links or len(links) != len(self.ids)
+
+    def line(self, id):
+        return self.lines[self.positions[id]]
+
+    def positions_of(self, ids):
+        return np.fromiter((self.positions[id] for id in ids), dtype=np.intp, count=len(ids))
+
+    def rectangle_distances(self, rectangles, ids=None):
+        """Matrice (liens, rectangles) des distances entre les liens (tous, ou ceux de `ids` dans leur ordre)
+        et le contour des rectangles (xmin, ymin, xmax, ymax)"""
+        segments = self.segments if ids is None else self.segments[self.positions_of(ids)]
+        return segment_rectangle_distances(segments, rectangles)
+
+    def endpoint_distances(self, point, ids=None):
+        """Distance d'un point a l'extremite la plus proche de chaque lien (tous, ou ceux de `ids` dans leur ordre)"""
+        segments = self.segments if ids is None else self.segments[self.positions_of(ids)]
+        differences = segments - np.asarray(point, dtype=np.float64)
+        return np.sqrt(differences[..., 0]**2 + differences[..., 1]**2).min(axis=1)
+
+    def nearest_endpoint(self, point, ids):
+        """(id, distance) du lien de `ids` dont une extremite est la plus proche du point, (None, inf) sans lien"""
+        ids = list(ids)
+        if not ids:
+            return None, float('inf')
+        distances = self.endpoint_distances(point, ids)
+        # argmin keeps the first of the equidistant links, in the order of `ids`
+        position = int(np.argmin(distances))
+        return ids[position], float(distances[position])
+
+    def nearest_rectangle(self, rectangle, ids):
+        """Comme nearest, pour un rectangle (xmin, ymin, xmax, ymax)"""
+        ids = list(ids)
+        if not ids:
+            return None, None
+        distances = self.rectangle_distances(rectangle, ids)[:, 0]
+        # argmin keeps the first of the equidistant links, in the order of `ids`
+        position = int(np.argmin(distances))
+        return ids[position], float(distances[position])
+
+    def within_rectangle(self, rectangle, ids, maxDistance):
+        """Comme within, pour un rectangle (xmin, ymin, xmax, ymax)"""
+        ids = list(ids)
+        if not ids:
+            return []
+        distances = self.rectangle_distances(rectangle, ids)[:, 0]
+        return [(ids[position], float(distances[position])) for position in np.flatnonzero(distances < maxDistance)]
+
+    def is_every_link(self, ids):
+        return len(ids) == len(self.ids) and ids == self.ids
+
+    def nearest(self, boundary, ids):
+        """(id, distance) du lien de `ids` le plus proche du contour, le premier dans l'ordre de `ids` en cas d'egalite
+
+        (None, None) si il n'y a aucun lien."""
+        ids = list(ids)
+        if not ids:
+            return None, None
+
+        if self.is_every_link(ids):
+            _, nearestDistance = self.tree.query_nearest(boundary, return_distance=True)
+            positions = self.tree.query(boundary, predicate='dwithin', distance=float(nearestDistance[0]) + INDEX_TOLERANCE)
+            candidates = [self.ids[position] for position in np.sort(positions)]
+        else:
+            positions = self.positions_of(ids)
+            distances = shapely.distance(boundary, self.lines[positions])
+            candidates = [id for id, distance in zip(ids, distances) if distance <= distances.min() + INDEX_TOLERANCE]
+
+        closestLink = None
+        minDistance = float('inf')
+        for id in candidates:
+            distance = boundary_distance(boundary, self.line(id))
+            if distance < minDistance:
+                minDistance = distance
+                closestLink = id
+        return closestLink, minDistance
+
+    def within(self, boundary, ids, maxDistance):
+        """[(id, distance), ...] des liens de `ids` a moins de `maxDistance` du contour, dans l'ordre de `ids`"""
+        ids = list(ids)
+        positions = self.tree.query(boundary, predicate='dwithin', distance=maxDistance + INDEX_TOLERANCE)
+
+        if self.is_every_link(ids):
+            candidates = [self.ids[position] for position in np.sort(positions)]
+        else:
+            near = set(positions.tolist())
+            candidates = [id for id in ids if self.positions[id] in near]
+
+        closests = []
+        for id in candidates:
+            distance = boundary_distance(boundary, self.line(id))
+            if distance < maxDistance:
+                closests.append((id, distance))
+        return closests
+
+
+class ZoneIndex:
+    """Index spatial (STRtree) des zones d'equipements, pour retrouver la zone la plus proche d'un point"""
+    def __init__(self, zones):
+        self.ids = list(zones)
+        rectangles = box_rectangles([zones[id]['box'] for id in self.ids])
+        self.polygons = shapely.box(rectangles[:, 0], rectangles[:, 1], rectangles[:, 2], rectangles[:, 3])
+        self.tree = shapely.STRtree(self.polygons)
+
+    def nearest(self, points, maxDistance):
+        """Zone la plus proche de chaque point (distance nulle a l'interieur), None au-dela de `maxDistance`
+
+        En cas d'egalite (zones qui se chevauchent), la premiere zone dans l'ordre des zones est gardee."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        nearest = [None] * len(points)
+        if not self.ids or not len(points):
+            return nearest
+
+        pointIndexes, zonePositions = self.tree.query_nearest(shapely.points(points), max_distance=maxDistance, all_matches=True)
+        positions = {}
+        for pointIndex, zonePosition in zip(pointIndexes.tolist(), zonePositions.tolist()):
+            if zonePosition < positions.get(pointIndex, len(self.ids)):
+                positions[pointIndex] = zonePosition
+        for pointIndex, zonePosition in positions.items():
+            nearest[pointIndex] = self.ids[zonePosition]
+        return nearest
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from termcolor import cprint
+
+
+# Budget memoire (en octets) alloue aux modeles gardes en memoire par le registre
+MODEL_MEMORY_BUDGET = 2 * 1024 ** 3
+
+
+class ModelRegistry:
+    """Registre des modeles d'IA charges dans le processus
+
+    Chaque modele est charge une seule fois, indexe par son chemin, l'empreinte (sha256) du fichier et le backend,
+    puis la meme instance est rendue a toutes les etapes de l'extraction et a tous les `Worker` suivants.
+    Lorsque le budget memoire est depasse, les modeles les moins recemment utilises sont liberes.
+    Un modele est charge hors du verrou du registre: les autres modeles restent disponibles pendant le chargement,
+    et les appels concurrents pour le meme modele attendent le chargement en cours.
+    """
+    def __init__(self, memoryBudget=MODEL_MEMORY_BUDGET):
+        self.memoryBudget = memoryBudget
+        self.models = OrderedDict() # {(path, digest, backend): (model, size)}
+        self.digests = {}   # {path: (signature, digest)}
+        self.loading = {}   # {(path, digest, backend): Future} models being loaded
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def file_signature(self, path):
+        """Date de modification et taille du fichier, ou de chaque fichier du dossier"""
+        if path.is_dir():
+            # The folder itself does not change when a file inside is replaced
+            return tuple((str(file.relative_to(path)), file.stat().st_mtime_ns, file.stat().st_size)
+                         for file in sorted(p for p in path.rglob("*") if p.is_file()))
+        stat = path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def file_digest(self, path):
+        """Empreinte sha256 du fichier (ou du dossier), recalculee seulement si un fichier a change"""
+        path = pathlib.Path(path).resolve()
+        signature = self.file_signature(path)
+        with self.lock:
+            cached = self.digests.get(path)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+        sha = hashlib.sha256()
+        if path.is_dir():
+            # Model saved as a folder (e.g. transformers): hash every file in a stable order
+            for file in sorted(p for p in path.rglob("*") if p.is_file()):
+                sha.update(str(file.relative_to(path)).encode())
+                with open(file, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        sha.update(chunk)
+        else:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self.lock:
+            self.digests[path] = (signature, digest)
+        return digest
+
+    def model_size(self, path):
+        """Estimation de la memoire occupee par un modele: la taille de ses poids sur le disque"""
+        path = pathlib.Path(path)
+        if path.is_dir():
+            return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+        return path.stat().st_size
+
+    def get(self, modelPath, loader=None, backend="torch"):
+        """Renvoie le modele charge depuis `modelPath`, en le chargeant au premier appel
+
+        - modelPath: chemin vers le fichier (ou dossier) du modele
+        - loader: fonction qui charge le modele a partir de son chemin (YOLO par defaut)
+        - backend: 'torch', 'onnx' (ONNX Runtime sur CPU) ou 'quantized' (INT8), fait partie de la cle du modele
+        """
+        modelPath = pathlib.Path(modelPath).resolve()
+        digest = self.file_digest(modelPath)
+        key = (str(modelPath), digest, backend)
+
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                self.hits += 1
+                return self.models[key][0]
+
+            # Only the first caller loads the model, the others wait for it
+            loading = self.loading.get(key)
+            owner = loading is None
+            if owner:
+                loading = self.loading[key] = Future()
+            else:
+                self.hits += 1
+        if not owner:
+            return loading.result()
+
+        try:
+            cprint(f"Loading model {modelPath.name} ({backend})...", "yellow")
+            model = self.load(modelPath, digest, loader, backend)
+            size = self.model_size(modelPath)
+        except BaseException as e:
+            with self.lock:
+                del self.loading[key]
+            loading.set_exception(e)
+            raise
+
+        with self.lock:
+            self.misses += 1
+
+            # Drop the older versions of the same file
+            for oldKey in [k for k in self.models if k[0] == key[0] and k[1] != key[1]]:
+                del self.models[oldKey]
+
+            self.models[key] = (model, size)
+            del self.loading[key]
+            self.evict()
+        loading.set_result(model)
+        return model
+
+    def load(self, modelPath, digest, loader, backend):
+        if loader is not None:
+            return loader(str(modelPath))
+
+        if backend in ("onnx", "quantized"):
+            try:
+                if backend == "quantized":
+                    from logic.quantization import load_quantized_yolo
+                    return load_quantized_yolo(modelPath, digest)
+                from logic.onnx_backend import load_onnx_yolo
+                return load_onnx_yolo(modelPath, digest)
+            except ImportError as e:
+                cprint(f"{backend} backend unavailable ({e}), using PyTorch", "yellow")
+
+        from ultralytics import YOLO
+        return YOLO(str(modelPath))
+
+    def evict(self):
+        """Libere les modeles les moins recemment utilises tant que le budget memoire est depasse"""
+        with self.lock:
+            # Always keep the most recent model, even if it alone exceeds the budget
+            while len(self.models) > 1 and self.memory_used() > self.memoryBudget:
+                (path, _, _), _ = self.models.popitem(last=False)
+                cprint(f"Model evicted from memory: {os.path.basename(path)}", "yellow")
+
+    def memory_used(self):
+        return sum(size for _, size in self.models.values())
+
+    def set_memory_budget(self, memoryBudget):
+        self.memoryBudget = memoryBudget
+        self.evict()
+
+    def clear(self):
+        with self.lock:
+            self.models.clear()
+
+
+# Registre partage par tout le processus
+model_registry = ModelRegistry()
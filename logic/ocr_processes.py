@@ -0,0 +1,115 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedImage:
+    """Image decodee copiee une seule fois dans une memoire partagee, lue sans copie par les processus d'OCR"""
+    def __init__(self, image):
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+        self.array = np.ndarray(image.shape, dtype=image.dtype, buffer=self.memory.buf)
+        self.array[...] = image
+        self.descriptor = (self.memory.name, image.shape, image.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.array = None
+        self.memory.close()
+        self.memory.unlink()
+
+
+# Etat d'un processus d'OCR: l'instance TopologyData et un lecteur par mode, crees une fois par processus
+_worker = {}
+
+
+def init_worker(cpuThreads, config):
+    """Initialisation d'un processus d'OCR (avant l'import de Paddle, qui lit les variables OpenMP/MKL)
+
+    - config: reglages de l'instance TopologyData du processus principal (TopologyData.ocr_worker_config)"""
+    os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(cpuThreads)
+
+    import cv2
+    from logic.topology_data import TopologyData
+
+    cv2.setNumThreads(cpuThreads)
+    _worker['threads'] = cpuThreads
+    data = TopologyData()
+    data.apply_ocr_worker_config(config)
+    _worker['data'] = data
+
+
+def worker_reader(mode):
+    if mode not in _worker:
+        from logic.ocr_readers import create_paddle_reader, create_paddle_recognizer
+
+        factory = create_paddle_recognizer if mode == 'recognition' else create_paddle_reader
+        _worker[mode] = factory(_worker['threads'])
+    return _worker[mode]
+
+
+def ocr_task(descriptor, mode, zones, kind='equipment'):
+    """OCR d'une tache (une zone en mode 'full' ou 'cascade', un lot de zones d'une ligne en mode 'recognition')
+    sur l'image partagee: les zones sont decoupees directement dans la memoire partagee
+
+    - kind: 'equipment' ou 'link_text', le type des zones (voir TopologyData.targeted_OCR)
+
+    Renvoie (textes des zones, temps de pre-traitement de la tache par moteur)"""
+    name, shape, dtype = descriptor
+    memory = shared_memory.SharedMemory(name=name)
+    image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf)
+    result = {}
+    try:
+        data = _worker['data']
+        if mode == 'cascade':
+            from logic.ocr_readers import easyocr_reader_pool
+
+            # One easyocr reader per process, as for the PaddleOCR readers
+            data.light_OCR(image, zones, result, easyocr_reader_pool(1), kind)
+        elif mode == 'recognition':
+            data.paddle_recognition(image, zones, result, worker_reader(mode))
+        else:
+            data.paddleOCR(image, zones, result, worker_reader(mode))
+    finally:
+        # Every view on the buffer must be released before closing it
+        image = None
+        memory.close()
+    return result, {engine: pipeline.take_stats() for engine, pipeline in data.preprocessing.items()}
+
+
+_pool = {}
+_poolLock = threading.Lock()
+
+
+def ocr_process_pool(workers, cpuThreads, config=None):
+    """Pool de processus d'OCR du processus principal, garde d'une extraction a l'autre (avec ses lecteurs)
+
+    Le pool est recree si le nombre de processus, leurs threads ou les reglages transmis aux processus changent."""
+    with _poolLock:
+        if _pool.get('config') != (workers, cpuThreads, config):
+            if 'executor' in _pool:
+                _pool['executor'].shutdown()
+            # spawn: Paddle and the Qt application must not be forked
+            _pool['executor'] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                                    initializer=init_worker, initargs=(cpuThreads, config))
+            _pool['config'] = (workers, cpuThreads, config)
+        return _pool['executor']
+
+
+def shutdown_ocr_process_pool():
+    with _poolLock:
+        if 'executor' in _pool:
+            _pool.pop('executor').shutdown(cancel_futures=True)
+            _pool.pop('config', None)
+
+
+atexit.register(shutdown_ocr_process_pool)
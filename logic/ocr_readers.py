@@ -0,0 +1,180 @@
+import os
+import pathlib
+import queue
+import threading
+import time
+from importlib import metadata
+from contextlib import contextmanager
+from functools import partial
+
+from termcolor import cprint
+
+from logic.model_registry import model_registry
+from logic.thread_budget import thread_budget
+
+
+# Nombre de lecteurs PaddleOCR gardes en memoire par le processus
+OCR_POOL_SIZE = 3
+
+# Modele de reconnaissance seule (le meme que celui du pipeline PaddleOCR complet en anglais)
+OCR_RECOGNITION_MODEL = "en_PP-OCRv5_mobile_rec"
+# Options du pipeline PaddleOCR complet (MKLDNN desactive pour eviter les erreurs de conversion PIR)
+PADDLE_READER_OPTIONS = {'use_angle_cls': True, 'lang': 'en', 'enable_mkldnn': False, 'return_word_box': True}
+
+# Dossier ou PaddleX telecharge les poids des modeles de PaddleOCR
+PADDLE_MODELS_DIRECTORY = pathlib.Path(os.environ.get("PADDLE_PDX_CACHE_HOME", pathlib.Path.home() / ".paddlex")) / "official_models"
+# Paquets dont la version change le texte lu
+OCR_PACKAGES = ('paddleocr', 'paddlex', 'paddlepaddle', 'pytesseract', 'easyocr')
+
+
+class ReaderPool:
+    """Reserve de lecteurs OCR partagee entre les threads
+
+    Les lecteurs sont crees a la demande (au plus `size`), puis pretes aux threads et rendus apres usage.
+    Ils survivent d'une extraction a l'autre. Le pool compte combien de fois un thread a du attendre un lecteur libre.
+    """
+    def __init__(self, factory, size=OCR_POOL_SIZE, name="reader"):
+        self.factory = factory
+        self.size = max(1, size)
+        self.name = name
+        self.available = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.acquisitions = 0
+        self.waits = 0
+        self.waitTime = 0.0
+
+    def acquire(self):
+        """Emprunte un lecteur: libre, nouvellement cree, ou le premier rendu par un autre thread"""
+        try:
+            reader = self.available.get_nowait()
+        except queue.Empty:
+            reader = None
+
+        if reader is None:
+            with self.lock:
+                create = self.created < self.size
+                if create:
+                    self.created += 1
+
+            if create:
+                try:
+                    reader = self.factory()
+                except Exception:
+                    with self.lock:
+                        self.created -= 1
+                    raise
+            else:
+                # Every reader is lent: wait for one to come back
+                start = time.perf_counter()
+                reader = self.available.get()
+                with self.lock:
+                    self.waits += 1
+                    self.waitTime += time.perf_counter() - start
+
+        with self.lock:
+            self.acquisitions += 1
+        return reader
+
+    def release(self, reader):
+        self.available.put(reader)
+
+    @contextmanager
+    def reader(self):
+        reader = self.acquire()
+        try:
+            yield reader
+        finally:
+            self.release(reader)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': self.size,
+                'created': self.created,
+                'acquisitions': self.acquisitions,
+                'waits': self.waits,
+                'wait_ratio': self.waits / self.acquisitions if self.acquisitions else 0.0,
+                'wait_time': self.waitTime,
+            }
+
+    def report(self):
+        stats = self.stats()
+        cprint(f"{self.name} pool: {stats['acquisitions']} acquisitions, {stats['waits']} waits "
+               f"({stats['wait_ratio']:.0%}, {stats['wait_time']:.2f}s), {stats['created']}/{stats['size']} readers", 'cyan')
+
+
+def create_paddle_reader(cpuThreads=None):
+    from paddleocr import PaddleOCR
+
+    return PaddleOCR(**PADDLE_READER_OPTIONS, cpu_threads=cpuThreads)
+
+
+def create_paddle_recognizer(cpuThreads=None):
+    from paddleocr import TextRecognition
+
+    return TextRecognition(model_name=OCR_RECOGNITION_MODEL, enable_mkldnn=False, cpu_threads=cpuThreads)
+
+
+def create_easyocr_reader():
+    import easyocr
+
+    return easyocr.Reader(['en'])
+
+
+def package_version(package):
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def ocr_engines_identity():
+    """Ce qui determine le texte lu par les moteurs d'OCR: versions des paquets, options des lecteurs
+    et empreinte des poids telecharges par PaddleOCR (recalculee seulement si un fichier a change)"""
+    weights = model_registry.file_digest(PADDLE_MODELS_DIRECTORY) if PADDLE_MODELS_DIRECTORY.is_dir() else None
+    return {
+        'packages': {package: package_version(package) for package in OCR_PACKAGES},
+        'reader': PADDLE_READER_OPTIONS,
+        'recognition_model': OCR_RECOGNITION_MODEL,
+        'weights': weights,
+    }
+
+
+def reader_threads(size):
+    """Threads internes d'un lecteur: les `size` lecteurs d'un pool peuvent tourner en meme temps"""
+    thread_budget.configure_environment(size)
+    return thread_budget.threads_per_worker(size)
+
+
+_pools = {}
+_poolsLock = threading.Lock()
+
+
+def paddle_reader_pool(size=None):
+    """Pool de lecteurs PaddleOCR du processus, cree au premier appel"""
+    with _poolsLock:
+        if 'paddle' not in _pools:
+            size = size or OCR_POOL_SIZE
+            _pools['paddle'] = ReaderPool(partial(create_paddle_reader, reader_threads(size)), size, name="PaddleOCR")
+        return _pools['paddle']
+
+
+def easyocr_reader_pool(size=None):
+    """Pool de lecteurs easyocr (cascade d'OCR), cree au premier appel: un lecteur n'est utilise que par un thread a la fois"""
+    with _poolsLock:
+        if 'easyocr' not in _pools:
+            _pools['easyocr'] = ReaderPool(create_easyocr_reader, size or OCR_POOL_SIZE, name="easyocr")
+        return _pools['easyocr']
+
+
+def recognizer_pool(size=None):
+    """Pool de modeles de reconnaissance seule (sans detection du texte), cree au premier appel"""
+    with _poolsLock:
+        if 'recognition' not in _pools:
+            size = size or OCR_POOL_SIZE
+            _pools['recognition'] = ReaderPool(partial(create_paddle_recognizer, reader_threads(size)), size,
+                                               name="PaddleOCR recognition")
+        return _pools['recognition']
@@ -0,0 +1,79 @@
+import pathlib
+import shutil
+
+import numpy as np
+from termcolor import cprint
+
+from logic.thread_budget import thread_budget
+
+
+# Dossier ou sont gardes les modeles exportes au format ONNX (a cote des poids PyTorch)
+ONNX_DIRECTORY = pathlib.Path(".") / "AI_models" / "onnx"
+# Threads utilises par ONNX Runtime pour un operateur (None: le budget de coeurs du processus)
+ONNX_INTRA_OP_THREADS = None
+
+
+def onnx_model_path(modelPath, digest, suffix=""):
+    """Chemin du modele exporte, dependant de l'empreinte des poids: un nouveau fichier .pt est re-exporte"""
+    modelPath = pathlib.Path(modelPath)
+    return ONNX_DIRECTORY / f"{modelPath.stem}-{digest[:12]}{suffix}.onnx"
+
+
+def export_to_onnx(modelPath, digest):
+    """Exporte le modele YOLO au format ONNX une seule fois, puis reutilise le fichier exporte"""
+    target = onnx_model_path(modelPath, digest)
+    if target.exists():
+        return target
+
+    from ultralytics import YOLO
+
+    cprint(f"Exporting {pathlib.Path(modelPath).name} to ONNX...", "yellow")
+    # dynamic=True keeps the rectangular inference sizes of the PyTorch path
+    exported = YOLO(str(modelPath)).export(format="onnx", dynamic=True, simplify=True)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(exported, target)
+    return target
+
+
+def session_options(threads=None):
+    """Options d'ONNX Runtime pour l'inference sur CPU"""
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    options.intra_op_num_threads = threads or ONNX_INTRA_OP_THREADS or thread_budget.cores
+    # One image at a time: parallelism comes from inside the operators
+    options.inter_op_num_threads = 1
+    return options
+
+
+def tune_session(model, onnxPath, threads=None):
+    """Remplace la session ONNX Runtime creee par ultralytics par une session aux reglages de threads choisis
+
+    ultralytics cree son predicteur (et sa session) au premier appel: un premier passage sur une image vide le construit.
+    """
+    import onnxruntime
+
+    model.predict(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+    backend = getattr(model.predictor, "model", None)
+    if backend is None or not hasattr(backend, "session"):
+        cprint("ONNX Runtime session not found, default thread settings kept", "yellow")
+        return model
+
+    backend.session = onnxruntime.InferenceSession(str(onnxPath), session_options(threads), providers=["CPUExecutionProvider"])
+    return model
+
+
+def load_onnx_yolo(modelPath, digest, threads=None):
+    """Charge le modele YOLO exporte en ONNX, execute par ONNX Runtime sur CPU
+
+    Le pre et post-traitement restent ceux d'ultralytics: les sorties des etapes sont inchangees."""
+    import onnxruntime  # noqa: F401 - fail early if the optional dependency is missing
+    from ultralytics import YOLO
+
+    onnxPath = export_to_onnx(modelPath, digest)
+    # The task (detect, obb) is read from the metadata written in the exported file
+    model = YOLO(str(onnxPath))
+    return tune_session(model, onnxPath, threads)
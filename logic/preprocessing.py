@@ -0,0 +1,132 @@
+import threading
+import time
+
+import cv2
+from termcolor import cprint
+
+
+def to_gray(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+# Agrandissement et bordure blanche appliques aux zones
+UPSCALE_FACTOR = 3
+PADDING = 10
+
+
+def upscale(image, factor=UPSCALE_FACTOR):
+    # 3x helps with small text
+    return cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+
+
+def pad(image, padding=PADDING):
+    # White border: critical for text touching the edges
+    return cv2.copyMakeBorder(image, padding, padding, padding, padding, cv2.BORDER_CONSTANT, value=255)
+
+
+def threshold(image):
+    return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+
+def denoise(image):
+    return cv2.fastNlMeansDenoising(image, None, h=10, templateWindowSize=7, searchWindowSize=21)
+
+
+def equalize(image):
+    return cv2.equalizeHist(image)
+
+
+def contrast(image):
+    return cv2.convertScaleAbs(image, alpha=2, beta=0)
+
+
+# Etapes de pre-traitement des zones avant l'OCR, dans leur ordre d'application
+PREPROCESSING_STEPS = {
+    'gray': to_gray,
+    'upscale': upscale,
+    'pad': pad,
+    'threshold': threshold,
+    'denoise': denoise,
+    'equalize': equalize,
+    'contrast': contrast,
+}
+
+# Etapes reellement utilisees par chaque moteur d'OCR: PaddleOCR lit la zone brute (il a son propre pre-traitement)
+OCR_PREPROCESSING = {
+    'paddle': (),
+    'tesseract': ('gray', 'upscale', 'pad'),
+    'easyocr': tuple(PREPROCESSING_STEPS),
+}
+
+
+class PreprocessingPipeline:
+    """Pre-traitement des zones pour un moteur d'OCR
+
+    Seules les etapes choisies sont executees (aucune pour un moteur qui n'en a pas besoin),
+    et le temps passe dans chaque etape est mesure."""
+    def __init__(self, steps=tuple(PREPROCESSING_STEPS), name="preprocessing"):
+        unknown = [step for step in steps if step not in PREPROCESSING_STEPS]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps: {unknown}")
+        self.steps = tuple(steps)
+        self.name = name
+        self.lock = threading.Lock()
+        self.images = 0
+        self.timings = {step: 0.0 for step in self.steps}
+
+    def run(self, image):
+        """Applique les etapes a l'image de la zone (rendue telle quelle si il n'y en a pas)"""
+        if not self.steps:
+            return image
+
+        timings = []
+        for step in self.steps:
+            start = time.perf_counter()
+            image = PREPROCESSING_STEPS[step](image)
+            timings.append((step, time.perf_counter() - start))
+
+        with self.lock:
+            self.images += 1
+            for step, duration in timings:
+                self.timings[step] += duration
+        return image
+
+    def zone_coordinates(self, points):
+        """Coordonnees dans la zone d'origine de points lus sur l'image pre-traitee (padding et agrandissement annules)"""
+        padding = PADDING if 'pad' in self.steps else 0
+        factor = UPSCALE_FACTOR if 'upscale' in self.steps else 1
+        return [[(float(x) - padding) / factor, (float(y) - padding) / factor] for x, y in points]
+
+    def config(self):
+        """Etapes et leurs parametres: ce qui change l'image lue par le moteur"""
+        return {
+            'steps': self.steps,
+            'upscale': UPSCALE_FACTOR if 'upscale' in self.steps else None,
+            'padding': PADDING if 'pad' in self.steps else None,
+        }
+
+    def stats(self):
+        with self.lock:
+            return {'images': self.images, 'timings': dict(self.timings), 'total': sum(self.timings.values())}
+
+    def take_stats(self):
+        """Statistiques depuis le dernier appel (remises a zero): celles d'un processus d'OCR, pour une tache"""
+        with self.lock:
+            stats = {'images': self.images, 'timings': dict(self.timings)}
+            self.images = 0
+            self.timings = {step: 0.0 for step in self.steps}
+        return stats
+
+    def merge_stats(self, stats):
+        """Ajoute les statistiques mesurees ailleurs (processus d'OCR)"""
+        with self.lock:
+            self.images += stats['images']
+            for step, duration in stats['timings'].items():
+                self.timings[step] = self.timings.get(step, 0.0) + duration
+
+    def report(self):
+        stats = self.stats()
+        if not stats['images']:
+            return
+        details = ", ".join(f"{step} {duration * 1000:.1f}ms" for step, duration in stats['timings'].items())
+        cprint(f"{self.name}: {stats['images']} zones, {stats['total'] * 1000:.1f}ms ({details})", 'cyan')
@@ -0,0 +1,110 @@
+import pathlib
+
+import cv2
+import numpy as np
+from termcolor import cprint
+
+from logic.onnx_backend import export_to_onnx, onnx_model_path, tune_session
+
+
+# Images de schemas locales utilisees pour calibrer la quantification statique des modeles YOLO
+CALIBRATION_DIRECTORY = pathlib.Path(".") / "AI_models" / "calibration"
+CALIBRATION_IMAGE_SIZE = 640
+CALIBRATION_MAX_IMAGES = 64
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def calibration_images(directory=CALIBRATION_DIRECTORY, limit=CALIBRATION_MAX_IMAGES):
+    directory = pathlib.Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(p for p in directory.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)[:limit]
+
+
+def yolo_input(image, size=CALIBRATION_IMAGE_SIZE):
+    """Pre-traitement d'une image comme YOLO: letterbox, BGR -> RGB, CHW, valeurs entre 0 et 1"""
+    height, width = image.shape[:2]
+    ratio = min(size / height, size / width)
+    newWidth, newHeight = max(1, round(width * ratio)), max(1, round(height * ratio))
+    resized = cv2.resize(image, (newWidth, newHeight), interpolation=cv2.INTER_LINEAR)
+    top = (size - newHeight) // 2
+    left = (size - newWidth) // 2
+    padded = cv2.copyMakeBorder(resized, top, size - newHeight - top, left, size - newWidth - left,
+                                cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    tensor = padded[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(tensor[np.newaxis])
+
+
+def calibration_reader(onnxPath, images):
+    """Lecteur des donnees de calibration pour onnxruntime.quantization.quantize_static"""
+    import onnxruntime
+    from onnxruntime.quantization import CalibrationDataReader
+
+    inputName = onnxruntime.InferenceSession(str(onnxPath), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class DiagramsReader(CalibrationDataReader):
+        def __init__(self):
+            self.images = iter(images)
+
+        def get_next(self):
+            for path in self.images:
+                image = cv2.imread(str(path))
+                if image is not None:
+                    return {inputName: yolo_input(image)}
+            return None
+
+    return DiagramsReader()
+
+
+def copy_metadata(source, target):
+    """Recopie les metadonnees ultralytics (tache, classes, taille d'image) dans le modele quantifie"""
+    import onnx
+
+    sourceModel = onnx.load(str(source), load_external_data=False)
+    targetModel = onnx.load(str(target))
+    del targetModel.metadata_props[:]
+    for prop in sourceModel.metadata_props:
+        targetModel.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(targetModel, str(target))
+
+
+def quantize_yolo(modelPath, digest, calibrationDirectory=CALIBRATION_DIRECTORY):
+    """Produit (une seule fois) la version INT8 du modele YOLO
+
+    Quantification statique calibree sur les images de `calibrationDirectory` si il y en a,
+    quantification dynamique (poids seulement) sinon."""
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    images = calibration_images(calibrationDirectory)
+    target = onnx_model_path(modelPath, digest, "-int8-static" if images else "-int8-dynamic")
+    if target.exists():
+        return target
+
+    fp32Path = export_to_onnx(modelPath, digest)
+    if images:
+        cprint(f"Quantizing {fp32Path.name} (static, {len(images)} calibration images)...", "yellow")
+        quantize_static(str(fp32Path), str(target), calibration_reader(fp32Path, images),
+                        quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    else:
+        cprint(f"Quantizing {fp32Path.name} (dynamic, no calibration images in {calibrationDirectory})...", "yellow")
+        quantize_dynamic(str(fp32Path), str(target), weight_type=QuantType.QInt8)
+
+    copy_metadata(fp32Path, target)
+    return target
+
+
+def load_quantized_yolo(modelPath, digest, threads=None):
+    """Charge la version INT8 du modele YOLO a la place des poids fp32"""
+    from ultralytics import YOLO
+
+    int8Path = quantize_yolo(modelPath, digest)
+    model = YOLO(str(int8Path))
+    return tune_session(model, int8Path, threads)
+
+
+def quantize_bert(model):
+    """Quantification dynamique INT8 des couches lineaires du modele BERT (pour le CPU)"""
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
@@ -0,0 +1,321 @@
+import ipaddress
+import re
+import threading
+from collections import OrderedDict
+
+from termcolor import cprint
+
+
+# Classes du modele BERT fine-tune (./AI_models/bert-finetuned)
+BERT_LABELS = {
+    0: "hostname",
+    1: "interface",
+    2: "ip_address",
+    3: "protocol",
+    4: "vlan"
+}
+BERT_BATCH_SIZE = 32
+BERT_CACHE_SIZE = 10000
+
+# Cascade: score minimal du modele BERT pour remplacer la classe donnee par les regles
+NEURAL_MIN_SCORE = 0.8
+# Classes BERT exprimees avec les noms des classes des regles
+NEURAL_TO_RULE_LABELS = {'ip_address': 'ip'}
+# Classes que BERT peut donner a un texte reconnu par aucune regle ('other'): les protocoles ne sont pas tous dans PROTOCOLS,
+# alors qu'un texte refuse par les regles de hostname, d'interface ou d'adresse est du bruit d'OCR
+NEURAL_OTHER_LABELS = frozenset({'protocol'})
+
+
+# Abreviations des interfaces et nom complet correspondant, dans l'ordre de priorite
+INTERFACE_PREFIXES = [
+    (r'(?:GigabitEthernet|Gig|Gi|g)([\doO]+(?:/[\doO]+){1,2})', 'GigabitEthernet'),
+    (r'(?:FastEthernet|FastEth|Fa|fo|f)([\doO]+(?:/[\doO]+){1,2})', 'FastEthernet'),
+    (r'(?:TenGigabitEthernet|TenGig|Te)([\doO]+(?:/[\doO]+){1,2})', 'TenGigabitEthernet'),
+    (r'(?:Ethernet|Eth|e)([\doO]+(?:/[\doO]+){0,2})', 'Ethernet'),
+    (r'(?:Serial|Se|s)([\doO]+(?:/[\doO]+){1,3})', 'Serial'),
+    (r'(?:Loopback|Lo)([\doO]+)', 'Loopback'),
+    (r'(?:Vlan|Vl|v)([\doO]+)', 'Vlan'),
+    (r'(?:Port-channel|Po)([\doO]+)', 'Port-channel'),
+]
+
+VALID_INTERFACES = [
+    r'GigabitEthernet\s?\d+(/\d+){1,2}',
+    r'FastEthernet\s?\d+(/\d+){1,2}',
+    r'Serial\s?\d+(/\d+){1,3}',
+    r'Loopback\d+',
+    r'Ethernet\s?\d+(/\d+){0,2}',
+    r'Port-channel\s?\d+',
+    r'TenGigabitEthernet\s?\d+(/\d+){1,2}'
+]
+
+PROTOCOLS = frozenset([
+    'OSPF', 'BGP', 'EIGRP', 'RIP', 'ISIS', 'HSRP', 'VRRP', 'GLBP', 
+    'STP', 'RSTP', 'MSTP', 'LACP', 'PAgP', 'DHCP', 'DNS', 'NTP', 
+    'SNMP', 'SSH', 'Telnet', 'HTTP', 'HTTPS', 'FTP', 'TFTP', 'ICMP', 
+    'TCP', 'UDP', 'GRE', 'IPsec', 'MPLS', 'LDP'
+])
+
+
+class RuleClassifier:
+    """Classification du texte par regles (expressions regulieres)
+
+    Toutes les expressions sont compilees une seule fois a la creation de l'objet.
+    Une liste de textes est classee en une passe: chaque texte distinct n'est evalue qu'une fois.
+    """
+    def __init__(self):
+        # One alternation for every abbreviation: the first alternative that matches wins, as in a loop over the patterns
+        self.interfaceAbbreviations = re.compile(
+            '^(?:' + '|'.join(f'{pattern}$' for pattern, _ in INTERFACE_PREFIXES) + ')', re.IGNORECASE)
+        self.interfacePrefixes = [prefix for _, prefix in INTERFACE_PREFIXES]
+        self.validInterface = re.compile('^(?:' + '|'.join(f'{pattern}$' for pattern in VALID_INTERFACES) + ')')
+
+        self.hostname = re.compile(r'^[a-zA-Z0-9]([a-zA-Z0-9\-\_]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-\_]{0,61}[a-zA-Z0-9])?)*$')
+        self.vlan = re.compile(r'^(VLAN\s?)?\d{1,4}$', re.IGNORECASE)
+        self.completeIp = re.compile(r'^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)(/(3[0-2]|[12]?[0-9]))?$')
+
+        # Incomplete IP: starts with a dot / digits.digits (partial) / simple number (1-3 digits)
+        self.incompleteIpDot = re.compile(r'^\.(\d{1,3})(\.\d{1,3})*(/(3[0-2]|[12]?[0-9]))?$')
+        self.incompleteIpPartial = re.compile(r'^(\d{1,3}\.)+\d{1,3}(/(3[0-2]|[12]?[0-9]))?$')
+        self.incompleteIpNumber = re.compile(r'^\d{1,3}$')
+
+        self.ip = re.compile('|'.join([
+            r'\b(?:\d{1,3}\.){1,3}\d{1,3}\b',
+            r'\b(?:\.\d{1,3}\.){1,2}\d{1,3}\b',
+            r'\b(?:\.\d{1,3})'
+        ]))
+
+        # Predicates in order of priority, for a list of texts and for a single text
+        self.listOrder = [
+            (self.is_interface, 'interface'),
+            (self.is_hostname, 'hostname'),
+            (self.is_protocol, 'protocol'),
+            (self.is_incomplete_ip, 'incomplete_ip'),
+            (self.is_vlan, 'vlan'),
+            (self.is_ip, 'ip'),
+            (self.is_ip_with_mask, 'ip'),
+        ]
+        self.textOrder = [
+            (self.is_hostname, 'hostname'),
+            (self.is_protocol, 'protocol'),
+            (self.is_incomplete_ip, 'incomplete_ip'),
+            (self.is_vlan, 'vlan'),
+            (self.is_ip, 'ip'),
+            (self.is_ip_with_mask, 'ip'),
+            (self.is_interface, 'interface'),
+        ]
+
+    def normalise_interfaces_names(self, text):
+        """Convertit les abreviations en noms complets d'interfaces reseau (f0/0, gi0/0, s0/0, eth0, ...)
+        en corrigeant les '0' lus 'o' ou 'O' par l'OCR dans la partie numerique."""
+        match = self.interfaceAbbreviations.match(text)
+        if not match:
+            return text
+        for group, numeric_part in enumerate(match.groups()):
+            if numeric_part is not None:
+                return self.interfacePrefixes[group] + numeric_part.replace('o', '0').replace('O', '0')
+        return text
+
+    def is_interface(self, text):
+        return self.validInterface.match(self.normalise_interfaces_names(text)) is not None
+
+    def is_hostname(self, text):
+        if text.isdigit():
+            return False
+        return self.hostname.match(text) is not None
+
+    def is_protocol(self, text):
+        return text.upper() in PROTOCOLS
+
+    def is_vlan(self, text):
+        return self.vlan.match(text) is not None
+
+    def is_complete_ip(self, text):
+        return self.completeIp.match(text) is not None
+
+    def is_incomplete_ip(self, text):
+        if self.incompleteIpDot.match(text) or self.incompleteIpNumber.match(text):
+            return True
+        if self.incompleteIpPartial.match(text):
+            # Not a complete IP (4 octets)
+            return text.count('.') != 3
+        return False
+
+    def is_ip(self, text):
+        return self.ip.fullmatch(text)
+
+    def is_ip_with_mask(self, text):
+        try:
+            ipaddress.IPv4Network(text, strict=False)
+            return True
+        except ValueError:
+            return False
+
+    def matches(self, text):
+        """Ensemble de toutes les classes dont le predicat est verifie par le texte"""
+        return {label for predicate, label in self.listOrder if predicate(text)}
+
+    def label(self, text, order=None):
+        """Classe d'un texte: le premier predicat verifie, 'other' sinon"""
+        for predicate, label in order or self.listOrder:
+            if predicate(text):
+                return label
+        return 'other'
+
+    def classify(self, texts):
+        """Classe une liste de textes, chaque texte distinct une seule fois: [label, ...] dans le meme ordre"""
+        label = self.label
+        labels = {text: label(text) for text in dict.fromkeys(texts)}
+        return [labels[text] for text in texts]
+
+    def classify_one(self, text):
+        """Classe un texte seul (ordre de priorite des textes isoles: le hostname d'abord)"""
+        return self.label(text, self.textOrder)
+
+
+rule_classifier = RuleClassifier()
+
+
+class BertClassifier:
+    """Classification du texte avec le modele BERT fine-tune
+
+    Le tokenizer et le modele sont charges une seule fois (l'instance est gardee par le registre des modeles).
+    Les textes sont classes par lots, et les resultats sont gardes en cache par texte exact:
+    les hostnames et noms d'interfaces se repetent d'un schema a l'autre.
+    Avec quantized=True, les couches lineaires sont quantifiees en INT8 pour l'inference sur CPU.
+    """
+    def __init__(self, modelPath, batchSize=BERT_BATCH_SIZE, cacheSize=BERT_CACHE_SIZE, quantized=False):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self.torch = torch
+        self.batchSize = batchSize
+        self.cacheSize = cacheSize
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Load tokenizer and model from local folder
+        self.tokenizer = AutoTokenizer.from_pretrained(modelPath, local_files_only=True)
+        self.model = AutoModelForSequenceClassification.from_pretrained(modelPath, local_files_only=True)
+        self.model.eval()
+        if quantized:
+            from logic.quantization import quantize_bert
+            self.model = quantize_bert(self.model)
+
+        # Add mapping from label ids to human-readable tags
+        self.model.config.id2label = {i: name for i, name in BERT_LABELS.items()}
+        self.model.config.label2id = {name: i for i, name in BERT_LABELS.items()}
+
+    def classify(self, texts):
+        """Classe une liste de textes: [{'label': str, 'score': float}, ...] dans le meme ordre"""
+        results = {}
+        with self.lock:
+            for text in texts:
+                if text in self.cache:
+                    self.cache.move_to_end(text)
+                    results[text] = self.cache[text]
+
+        # Only the strings never seen before go through the model, each one once
+        missing = list(dict.fromkeys(text for text in texts if text not in results))
+        for start in range(0, len(missing), self.batchSize):
+            batch = missing[start:start + self.batchSize]
+            for text, result in zip(batch, self.predict(batch)):
+                results[text] = result
+
+        with self.lock:
+            for text in missing:
+                self.cache[text] = results[text]
+            while len(self.cache) > self.cacheSize:
+                self.cache.popitem(last=False)
+
+        return [results[text] for text in texts]
+
+    def predict(self, batch):
+        """Inference sur un lot de textes, completes (padding) a la meme longueur"""
+        encoded = self.tokenizer(batch, padding=True, truncation=True, return_tensors="pt")
+        with self.torch.inference_mode():
+            logits = self.model(**encoded).logits
+            scores, labels = self.torch.softmax(logits, dim=-1).max(dim=-1)
+
+        id2label = self.model.config.id2label
+        return [{'label': id2label[int(label)], 'score': float(score)} for label, score in zip(labels, scores)]
+
+    def report(self):
+        cprint(f"BERT classifier: {len(self.cache)} texts cached", 'cyan')
+
+
+class CascadeClassifier:
+    """Classification en cascade: les regles d'abord, le modele BERT pour les cas ambigus seulement
+
+    Un texte est resolu par les regles quand une seule classe specifique le reconnait ('hostname' n'est retenu
+    que si aucune autre regle ne s'applique), ou quand 'incomplete_ip' le reconnait: le modele n'a pas cette classe,
+    et elle passe avant 'vlan' et 'ip' dans l'ordre des regles.
+    Les textes non reconnus ('other') ou reconnus par plusieurs regles sont envoyes, par lots, au modele BERT,
+    qui ne fait que departager les classes des regles: sa classe n'est retenue que si l'une des regles verifiees
+    par le texte la donne (pour 'other', seulement les classes de NEURAL_OTHER_LABELS).
+    Sinon, ou si le modele n'est pas disponible ou pas assez sur de lui, la classe des regles est gardee.
+    """
+    def __init__(self, neuralLoader=None, rules=rule_classifier, minScore=NEURAL_MIN_SCORE):
+        self.rules = rules
+        self.neuralLoader = neuralLoader
+        self.neural = None
+        self.neuralAvailable = neuralLoader is not None
+        self.minScore = minScore
+        self.stats = {'rules': 0, 'neural': 0, 'fallback': 0}
+
+    def rule_label(self, text):
+        """Classe donnee par les regles si elle est sans ambiguite, None sinon"""
+        matched = self.rules.matches(text)
+        if len(matched) > 1:
+            matched.discard('hostname')
+        # BERT has no class for the incomplete addresses: it cannot tell '10' (end of an address) from a vlan
+        if 'incomplete_ip' in matched:
+            return 'incomplete_ip'
+        if len(matched) == 1:
+            return matched.pop()
+        return None
+
+    def neural_classifier(self):
+        if self.neural is None and self.neuralAvailable:
+            try:
+                self.neural = self.neuralLoader()
+            except Exception as e:
+                cprint(f"Neural text classifier unavailable, rules only: {e}", 'yellow')
+                self.neuralAvailable = False
+        return self.neural
+
+    def classify(self, texts, order=None):
+        """Classe une liste de textes: [label, ...] dans le meme ordre
+
+        - order: ordre de priorite des regles pour les textes que le modele ne resout pas (celui des listes par defaut)"""
+        labels = [self.rule_label(text) for text in texts]
+        ambiguous = [index for index, label in enumerate(labels) if label is None]
+        self.stats['rules'] += len(texts) - len(ambiguous)
+
+        neural = self.neural_classifier() if ambiguous else None
+        predictions = neural.classify([texts[index] for index in ambiguous]) if neural else [None] * len(ambiguous)
+
+        for index, prediction in zip(ambiguous, predictions):
+            label = self.neural_label(texts[index], prediction)
+            if label is not None:
+                labels[index] = label
+                self.stats['neural'] += 1
+            else:
+                labels[index] = self.rules.label(texts[index], order)
+                self.stats['fallback'] += 1
+
+        return labels
+
+    def neural_label(self, text, prediction):
+        """Classe du modele si il est assez sur de lui et qu'une regle verifiee par le texte la donne, None sinon"""
+        if prediction is None or prediction['score'] < self.minScore:
+            return None
+        allowed = self.rules.matches(text) or NEURAL_OTHER_LABELS
+        label = NEURAL_TO_RULE_LABELS.get(prediction['label'], prediction['label'])
+        return label if label in allowed else None
+
+    def report(self):
+        total = sum(self.stats.values())
+        if not total:
+            return
+        shares = ", ".join(f"{tier}: {count} ({count / total:.0%})" for tier, count in self.stats.items())
+        cprint(f"Text classification cascade: {shares}", 'cyan')
@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+import cv2
+from termcolor import cprint
+
+
+# Nombre total de coeurs que l'extraction peut occuper (TOPOLOGY_CPU_THREADS pour le changer, par defaut tous)
+CPU_THREADS = int(os.environ.get("TOPOLOGY_CPU_THREADS", 0)) or os.cpu_count() or 1
+
+
+class ThreadBudget:
+    """Repartition d'un budget global de coeurs entre torch, Paddle (MKL/OpenMP), ONNX Runtime et OpenCV
+
+    Chaque etape declare combien de workers tournent en parallele: chacun recoit `cores // workers` threads
+    internes, de sorte que workers x threads ne depasse jamais le budget (pas de sursouscription des coeurs).
+    """
+    def __init__(self, cores=CPU_THREADS):
+        self.cores = max(1, cores)
+        self.lock = threading.Lock()
+
+    def threads_per_worker(self, workers=1):
+        return max(1, self.cores // max(1, workers))
+
+    def configure_environment(self, workers=1):
+        """Threads OpenMP/MKL des bibliotheques qui les lisent a leur import (Paddle), sans ecraser un reglage explicite"""
+        threads = str(self.threads_per_worker(workers))
+        for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(variable, threads)
+
+    def set_threads(self, threads):
+        cv2.setNumThreads(threads)
+        # Only if torch is already in use: the budget must not import it
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            torch.set_num_threads(threads)
+
+    @contextmanager
+    def stage(self, name, workers=1):
+        """Regle les threads internes de torch et d'OpenCV pour une etape de `workers` workers paralleles"""
+        threads = self.threads_per_worker(workers)
+        with self.lock:
+            previousCv2 = cv2.getNumThreads()
+            torch = sys.modules.get("torch")
+            previousTorch = torch.get_num_threads() if torch is not None else None
+            self.set_threads(threads)
+
+        cprint(f"{name}: {workers} worker(s) x {threads} thread(s) = {workers * threads}/{self.cores} cores", 'cyan')
+        try:
+            yield threads
+        finally:
+            with self.lock:
+                cv2.setNumThreads(previousCv2)
+                if previousTorch is not None:
+                    torch.set_num_threads(previousTorch)
+
+
+# Budget partage par tout le processus
+thread_budget = ThreadBudget()
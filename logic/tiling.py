@@ -0,0 +1,221 @@
+import math
+
+import cv2
+import numpy as np
+
+
+# Decoupage des grands schemas en tuiles qui se chevauchent
+TILE_SIZE = 1280
+TILE_OVERLAP = 0.2
+# Au-dela de cette taille (plus grand cote, en pixels), la detection se fait par tuiles
+TILING_MIN_SIZE = 4096
+TILE_BATCH_SIZE = 8
+TILE_NMS_IOU = 0.5
+# Distance (en pixels) au bord interieur d'une tuile en dessous de laquelle une detection est consideree coupee
+TILE_EDGE_MARGIN = 2
+# Ecart d'angle maximal (en radians) entre deux morceaux d'un meme lien coupe par une tuile
+TILE_ANGLE_TOLERANCE = math.radians(10)
+# Recouvrement minimal, le long du bord qui coupe une zone, de deux morceaux de la meme zone (part de la plus petite)
+TILE_SEAM_OVERLAP = 0.5
+
+
+def tiling_parameters():
+    """Reglages dont depend le resultat de la detection par tuiles (partie de la cle du cache d'inference)"""
+    return {
+        'tile_size': TILE_SIZE,
+        'overlap': TILE_OVERLAP,
+        'min_size': TILING_MIN_SIZE,
+        'nms_iou': TILE_NMS_IOU,
+        'edge_margin': TILE_EDGE_MARGIN,
+        'angle_tolerance': TILE_ANGLE_TOLERANCE,
+        'seam_overlap': TILE_SEAM_OVERLAP,
+    }
+
+
+def tile_starts(length, tileSize, stride):
+    if length <= tileSize:
+        return [0]
+    starts = list(range(0, length - tileSize, stride))
+    return starts + [length - tileSize]
+
+
+def tile_grid(width, height, tileSize=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Tuiles (x1, y1, x2, y2) couvrant toute l'image, la derniere de chaque rangee alignee sur le bord"""
+    stride = max(1, int(tileSize * (1 - overlap)))
+    return [(x, y, min(x + tileSize, width), min(y + tileSize, height))
+            for y in tile_starts(height, tileSize, stride)
+            for x in tile_starts(width, tileSize, stride)]
+
+
+def truncated_edges(xyxy, tile, width, height, margin=TILE_EDGE_MARGIN):
+    """Bords de la tuile, qui ne sont pas des bords de l'image, touches par la detection: elle y est probablement coupee
+
+    Renvoie [(cote, position du bord), ...] avec cote 'left', 'top', 'right' ou 'bottom'."""
+    x1, y1, x2, y2 = xyxy
+    tx1, ty1, tx2, ty2 = tile
+    edges = []
+    if tx1 > 0 and x1 - tx1 <= margin:
+        edges.append(('left', tx1))
+    if ty1 > 0 and y1 - ty1 <= margin:
+        edges.append(('top', ty1))
+    if tx2 < width and tx2 - x2 <= margin:
+        edges.append(('right', tx2))
+    if ty2 < height and ty2 - y2 <= margin:
+        edges.append(('bottom', ty2))
+    return edges
+
+
+def is_truncated(xyxy, tile, width, height, margin=TILE_EDGE_MARGIN):
+    """La detection touche un bord de la tuile qui n'est pas un bord de l'image: elle est probablement coupee"""
+    return bool(truncated_edges(xyxy, tile, width, height, margin))
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def iou_with(box, boxes):
+    """IoU d'une boite (4,) avec des boites (N, 4), calcule comme iou()"""
+    width = np.maximum(0.0, np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0]))
+    height = np.maximum(0.0, np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1]))
+    intersection = width * height
+    union = (box[2] - box[0]) * (box[3] - box[1]) + (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]) - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def non_max_suppression(detections, iouThreshold=TILE_NMS_IOU):
+    """Supprime les doublons (meme classe, IoU eleve) venant des zones de chevauchement, le plus sur est garde
+
+    NMS glouton, classe par classe: chaque boite gardee elimine d'un coup (NumPy) les boites restantes qu'elle recouvre."""
+    if not detections:
+        return []
+    order = sorted(range(len(detections)), key=lambda i: -detections[i]['conf'])
+    boxes = np.array([detections[i]['xyxy'] for i in order], dtype=np.float64)
+    classes = np.array([detections[i]['cls'] for i in order])
+
+    keep = np.zeros(len(order), dtype=bool)
+    for cls in np.unique(classes):
+        # Positions of the class in decreasing confidence
+        remaining = np.flatnonzero(classes == cls)
+        while remaining.size:
+            first, remaining = remaining[0], remaining[1:]
+            keep[first] = True
+            remaining = remaining[iou_with(boxes[first], boxes[remaining]) < iouThreshold]
+    return [detections[order[position]] for position in np.flatnonzero(keep)]
+
+
+def same_direction(a, b, tolerance=TILE_ANGLE_TOLERANCE):
+    difference = abs(a - b) % math.pi
+    return min(difference, math.pi - difference) <= tolerance
+
+
+def touching(a, b, margin=TILE_EDGE_MARGIN):
+    return not (a[2] + margin < b[0] or b[2] + margin < a[0] or a[3] + margin < b[1] or b[3] + margin < a[1])
+
+
+def collinear(a, b, margin=TILE_EDGE_MARGIN):
+    """Deux boites orientees sur la meme droite: le centre de b est sur l'axe de a, a l'epaisseur pres"""
+    ax, ay, aw, ah, ar = a['xywhr']
+    bx, by, bw, bh, _ = b['xywhr']
+    # Axis of a along its longer side, offset of the center of b along the normal
+    angle = ar if aw >= ah else ar + math.pi / 2
+    offset = abs(-(bx - ax) * math.sin(angle) + (by - ay) * math.cos(angle))
+    return offset <= max(min(aw, ah), min(bw, bh)) / 2 + margin
+
+
+def crosses_seam(a, b, margin=TILE_EDGE_MARGIN, minOverlap=TILE_SEAM_OVERLAP):
+    """b prolonge a de l'autre cote d'un bord de tuile qui coupe a
+
+    b doit recouvrir a (et pas seulement le toucher) de part et d'autre du bord, et etre aligne avec a le long du bord:
+    deux zones distinctes adjacentes, coupees par le meme bord, ne sont pas reunies."""
+    for side, position in a['cuts']:
+        axis = 0 if side in ('left', 'right') else 1
+        low, high = a['xyxy'][axis], a['xyxy'][axis + 2]
+        otherLow, otherHigh = b['xyxy'][axis], b['xyxy'][axis + 2]
+        if side in ('right', 'bottom'):
+            across = otherHigh > position + margin and otherLow < high - margin
+        else:
+            across = otherLow < position - margin and otherHigh > low + margin
+        if not across:
+            continue
+
+        if 'corners' in a:
+            aligned = collinear(a, b, margin)
+        else:
+            # Overlap along the seam, as a share of the smaller extent
+            other = 1 - axis
+            overlap = min(a['xyxy'][other + 2], b['xyxy'][other + 2]) - max(a['xyxy'][other], b['xyxy'][other])
+            extent = min(a['xyxy'][other + 2] - a['xyxy'][other], b['xyxy'][other + 2] - b['xyxy'][other])
+            aligned = extent > 0 and overlap >= minOverlap * extent
+        if aligned:
+            return True
+    return False
+
+
+def merge_seams(detections):
+    """Fusionne les morceaux d'une meme detection coupee par les bords des tuiles
+
+    Deux detections de meme classe sont reunies si l'une des deux est coupee par un bord de tuile et que l'autre
+    la prolonge de l'autre cote de ce bord (crosses_seam), et, pour les boites orientees, si elles ont la meme
+    direction. Les candidats sont d'abord filtres en une fois (meme classe, boites qui se touchent)."""
+    parents = list(range(len(detections)))
+
+    def root(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    truncated = [i for i, d in enumerate(detections) if d['truncated']]
+    if not truncated:
+        return detections
+    boxes = np.array([d['xyxy'] for d in detections], dtype=np.float64)
+    classes = np.array([d['cls'] for d in detections])
+    margin = TILE_EDGE_MARGIN
+    for i in truncated:
+        a = detections[i]
+        box = boxes[i]
+        candidates = ((classes == a['cls']) & (boxes[:, 0] <= box[2] + margin) & (box[0] <= boxes[:, 2] + margin)
+                      & (boxes[:, 1] <= box[3] + margin) & (box[1] <= boxes[:, 3] + margin))
+        candidates[i] = False
+        for j in np.flatnonzero(candidates).tolist():
+            b = detections[j]
+            if 'corners' in a and not same_direction(a['xywhr'][4], b['xywhr'][4]):
+                continue
+            if crosses_seam(a, b):
+                parents[root(i)] = root(j)
+
+    groups = {}
+    for i in range(len(detections)):
+        groups.setdefault(root(i), []).append(detections[i])
+
+    return [group[0] if len(group) == 1 else merge_group(group) for group in groups.values()]
+
+
+def merge_group(group):
+    xyxy = (min(d['xyxy'][0] for d in group), min(d['xyxy'][1] for d in group),
+            max(d['xyxy'][2] for d in group), max(d['xyxy'][3] for d in group))
+    merged = {'cls': group[0]['cls'], 'conf': max(d['conf'] for d in group), 'xyxy': xyxy, 'truncated': False, 'cuts': []}
+
+    if 'corners' in group[0]:
+        # Smallest rotated rectangle holding every piece of the link
+        corners = np.array([c for d in group for c in d['corners']], dtype=np.float32)
+        (cx, cy), (w, h), angle = cv2.minAreaRect(corners)
+        merged['corners'] = [tuple(p) for p in cv2.boxPoints(((cx, cy), (w, h), angle)).tolist()]
+        merged['xywhr'] = (cx, cy, w, h, math.radians(angle))
+    else:
+        merged['xywh'] = ((xyxy[0] + xyxy[2]) / 2, (xyxy[1] + xyxy[3]) / 2, xyxy[2] - xyxy[0], xyxy[3] - xyxy[1])
+    return merged
+
+
+def assign_ids(detections):
+    """Identifiants stables: dans l'ordre de confiance decroissante (comme le tracker sur une seule image),
+    puis de position pour departager les egalites"""
+    ordered = sorted(detections, key=lambda d: (-d['conf'], d['xyxy'][1], d['xyxy'][0]))
+    for id, detection in enumerate(ordered, start=1):
+        detection['id'] = id
+    return ordered
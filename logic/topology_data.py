@@ -1,35 +1,149 @@
+import queue
 import threading
 import pathlib
 import cv2
 
-from ultralytics import YOLO
-import easyocr
-from paddleocr import PaddleOCR
 import pytesseract
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 
-import sqlite3
-import re
 import ipaddress
-import yaml
-from itertools import islice, chain
 
 import numpy as np
 import shutil
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-from shapely.geometry import LineString, Polygon
-from shapely.ops import nearest_points
-import math
+from concurrent.futures import wait
+from functools import partial
+from shapely.geometry import Polygon
 
 from termcolor import cprint
 
-class TopologyData:
-    """Extraction des données de topologie"""
+from logic.model_registry import model_registry
+from logic.topology_store import TopologyStore
+from logic.ocr_readers import (OCR_POOL_SIZE, easyocr_reader_pool, ocr_engines_identity, paddle_reader_pool,
+                               recognizer_pool)
+from logic.inference_cache import inference_cache
+from logic.thread_budget import thread_budget
+from logic.preprocessing import OCR_PREPROCESSING, PreprocessingPipeline
+from logic.image_context import ImageContext, crop_box
+from logic.link_index import LinkIndex, ZoneIndex
+from logic.topology_graph import TopologyGraph
+from logic.geometry import box_rectangles, points_rectangle, segment_rectangle_distances
+from logic.text_classifier import BertClassifier, CascadeClassifier, rule_classifier
+from logic.tiling import (TILE_BATCH_SIZE, TILE_SIZE, TILING_MIN_SIZE, assign_ids, merge_seams,
+                          non_max_suppression, tile_grid, tiling_parameters, truncated_edges)
+
+# Modeles YOLO des etapes d'extraction (dans ./AI_models)
+ZONES_MODEL = "zones_detection_x.pt"
+LINKS_MODEL = "links_detection.pt"
+EQUIPMENT_MODEL = "detect_equipment.pt"
+
+# Distance maximale (en pixels) entre l'extremite d'un lien et la zone d'equipement a laquelle il est rattache
+LINK_ENDPOINT_TOLERANCE = 20
+
+# Detection par tuiles des zones et des liens (voir logic/tiling.py): False jamais, True toujours,
+# None seulement pour les images tres grandes (TILING_MIN_SIZE). Elle change les ids des detections: a activer soi-meme
+TILED_INFERENCE = False
+
+# Cache des sorties des etapes d'inference (voir logic/inference_cache.py)
+INFERENCE_CACHE = True
+
+# Classification des equipements par lots: taille des lots (1: une zone a la fois, le chemin d'origine).
+# Les lots ne sont pas redimensionnes exactement comme une zone seule: verifier sur de vrais schemas que les classes
+# sont les memes (benchmarks/equipment_batch_benchmark.py) avant de l'augmenter
+EQUIPMENT_BATCH_SIZE = 1
+
+# Execution des modeles: 'torch', 'onnx' (YOLO exportes une fois, executes par ONNX Runtime sur CPU)
+# ou 'quantized' (YOLO et BERT quantifies en INT8, voir logic/quantization.py)
+INFERENCE_BACKEND = 'torch'
+
+# OCR: 'full' relance la detection du texte de PaddleOCR sur chaque zone,
+# 'recognition' ne lance que la reconnaissance sur les zones de texte des liens d'une seule ligne deja localisees par YOLO
+# (le texte recoit alors les coordonnees de toute la zone: les zones d'equipements, dont les coordonnees du texte
+# placent les interfaces sur les liens, passent toujours par le pipeline complet),
+# 'cascade' essaie d'abord les moteurs legers (tesseract, easyocr) et ne garde PaddleOCR que pour les zones douteuses
+OCR_MODE = 'full'
+# Moteurs de la cascade d'OCR et confiance minimale pour qu'ils reglent une zone (PaddleOCR regle les autres)
+OCR_CASCADE_TIERS = (('tesseract', 0.85), ('easyocr', 0.7))
+EASYOCR_OPTIONS = {
+    'decoder': 'beamsearch',
+    'contrast_ths': 0.05,
+    'adjust_contrast': 0.7,
+    'text_threshold': 0.5,  # Lowered from 0.6
+    'low_text': 0.3,        # Lowered from 0.4
+    'mag_ratio': 1.0,       # We already upscaled
+    'link_threshold': 0.5,
+}
+OCR_RECOGNITION_BATCH_SIZE = 32
+# Nombre de threads d'OCR (None: selon le nombre de coeurs et la taille du pool de lecteurs)
+OCR_WORKERS = None
+# Execution de l'OCR: 'threads' (lecteurs partages entre threads) ou 'processes' (un lecteur par processus,
+# l'image etant placee une seule fois en memoire partagee)
+OCR_BACKEND = 'threads'
+OCR_MIN_SCORE = 0.5
+
+# Classification du texte: 'rules' (regles seules, les classes d'origine) ou 'cascade' (regles, puis BERT pour les
+# textes ambigus). La cascade change des classes, meme sans BERT: un texte reconnu par plusieurs regles n'est plus
+# classe 'hostname' (ex. 'OSPF' -> 'protocol', 'vlan10' -> 'vlan'), voir CascadeClassifier
+TEXT_CLASSIFIER = 'rules'
+
+class TopologyData(TopologyStore):
+    """Extraction des données de topologie
+
+    Les moteurs d'OCR et les modeles ne sont charges qu'a leur premiere utilisation:
+    les methodes de sauvegarde (TopologyStore) n'en ont pas besoin."""
     def __init__(self):
         self.data = []
-        self.reader = easyocr.Reader(['en'])
+        self._reader = None
+        self.readerLock = threading.Lock()
+        self._imageContext = None
+        self._linkIndex = None
+        self._linkTextDistances = None
+        self.graph = None
         self.status_callback = None
+        self.equipmentBatchSize = EQUIPMENT_BATCH_SIZE
+        self.inferenceBackend = INFERENCE_BACKEND
+        self.tiledInference = TILED_INFERENCE
+        self.useInferenceCache = INFERENCE_CACHE
+        self.ocrMode = OCR_MODE
+        self.ocrBackend = OCR_BACKEND
+        self.ocrTierCounts = {name: 0 for name, _ in OCR_CASCADE_TIERS} | {'paddle': 0}
+        self.unavailableOcrTiers = set()
+        # Pre-traitement des zones par moteur d'OCR (voir logic/preprocessing.py)
+        self.preprocessing = {backend: PreprocessingPipeline(steps, name=f"{backend} preprocessing")
+                              for backend, steps in OCR_PREPROCESSING.items()}
+        self.textClassifier = TEXT_CLASSIFIER
+        self._cascade = None
+
+    @property
+    def reader(self):
+        """Lecteur easyocr, cree au premier acces"""
+        with self.readerLock:
+            # Created once even when several OCR threads need it at the same time
+            if self._reader is None:
+                import easyocr
+                self._reader = easyocr.Reader(['en'])
+        return self._reader
+
+    @property
+    def image_context(self):
+        """Image du schema (self.imagePath) decodee une seule fois pour toutes les etapes"""
+        if self._imageContext is None or self._imageContext.path != str(self.imagePath):
+            self._imageContext = ImageContext(self.imagePath)
+        return self._imageContext
+
+    @property
+    def link_index(self):
+        """Index spatial des liens (self.links), reconstruit si les liens ont change"""
+        if self._linkIndex is None or self._linkIndex.is_stale(self.links):
+            self._linkIndex = LinkIndex(self.links)
+        return self._linkIndex
+
+    @property
+    def cascade(self):
+        """Classifieur en cascade regles -> BERT, le modele BERT n'etant charge qu'au premier texte ambigu"""
+        if self._cascade is None:
+            self._cascade = CascadeClassifier(self.load_bert_classifier)
+        return self._cascade
 
     def emit_status(self, message):
         if self.status_callback:
@@ -42,13 +156,16 @@ class TopologyData:
         self.import_the_image(imagePath, currentProjectPath)
 
         self.emit_status("Running Zones Detection...")
-        self.detect_zones("zones_detection_x.pt")
+        with thread_budget.stage("Zones detection"):
+            self.detect_zones(ZONES_MODEL)
 
         self.emit_status("Detecting Links...")
-        self.detect_links("links_detection.pt")
+        with thread_budget.stage("Links detection"):
+            self.detect_links(LINKS_MODEL)
 
         self.emit_status("Detecting Equipment Details...")
-        self.equipment_detection("detect_equipment.pt")
+        with thread_budget.stage("Equipment detection"):
+            self.equipment_detection(EQUIPMENT_MODEL)
 
         self.emit_status("Running OCR on Equipment Zones...")
         self.OCR_on_detected_equipments_zones()
@@ -56,9 +173,17 @@ class TopologyData:
         self.emit_status("Running OCR on Link Text Zones...")
         self.OCR_on_detected_link_text_zones()
 
+        for pipeline in self.preprocessing.values():
+            pipeline.report()
+        if self.ocrMode == 'cascade':
+            self.report_ocr_tiers()
+
         self.emit_status("Processing Text relations...")
-        self.process_text()
+        with thread_budget.stage("Text relations"):
+            self.process_text()
         self.links_text_treatment()
+        if self._cascade is not None:
+            self._cascade.report()
         
         # Prepare enriched data for export/return
         # We inject protocol/vlan info from links_map into zoneLinkText so the UI has everything in one place
@@ -81,6 +206,9 @@ class TopologyData:
                 elif cls == 'vlan':
                     zone_data['vlans'][link_id] = text
 
+        # The decoded image is not needed anymore
+        self.image_context.release()
+
         data = self.format_data_for_yaml(self.zoneLinkText)
         return data
     
@@ -109,6 +237,12 @@ class TopologyData:
         # y4 = y1
         return ((x1, y1), (x1, y1 + h), (x1 + w, y1 + h), (x1 + w, y1))
 
+    def load_bert_classifier(self):
+        """Classifieur BERT (./AI_models/bert-finetuned), quantifie avec le profil 'quantized'"""
+        quantized = self.inferenceBackend == 'quantized'
+        return model_registry.get(self.AI_model_path("bert-finetuned"), partial(BertClassifier, quantized=quantized),
+                                  'quantized' if quantized else 'torch')
+
     def AI_model_path(self, model):
         """Constitue le chemin vers le modele d'IA a utiliser"""
 
@@ -117,6 +251,10 @@ class TopologyData:
         modelPath = pathlib.Path(modelsDirectory) / model
         return modelPath
 
+    def load_model(self, model, loader=None):
+        """Charge le modele depuis le registre partage: il n'est deserialise qu'une fois par processus"""
+        return model_registry.get(self.AI_model_path(model), loader, self.inferenceBackend)
+
     def detect_zones(self, model: str):
         """Zones detection
 
@@ -131,87 +269,234 @@ class TopologyData:
         - detected_extratext_zones
         """
 
-        # Chargement de l'image
-        imagePath = self.imagePath
+        # Zones already detected on this image with this model are read from the inference cache
+        zones = self.cached_stage('zones', model, self.tiling_params(), lambda: self.run_zones_detection(model))
+        self.detected_equipments_zones, self.detected_linktext_zones, self.detected_extratext_zones = zones
 
-        # Chargement du model
-        modelPath = self.AI_model_path(model)
-        model = YOLO(modelPath)
+        # TODO: Remove the print()
+        cprint("Equipments zones detection done", 'green')
 
-        # Detection des equipements
-        results = model.track(imagePath)
+    def run_zones_detection(self, model):
+        """Detection des zones avec YOLO: renvoie (zones d'equipements, zones de texte des liens, zones de texte)"""
+
+        # Image decodee une seule fois (partagee par toutes les etapes)
+        image = self.image_context.image
+
+        # Chargement du model
+        model = self.load_model(model)
 
         # Recuperation de la localisation des zones detectees et des indexes
         self.detected_equipments_zones = {}
         self.detected_linktext_zones = {}
         self.detected_extratext_zones = {}
-        for result in results:
-            for box in result.boxes:
-                match box.cls[0]:
-                    case 0:
-                        # Class: 'equipment_zone'
-                        id = int(box.id[0].item())
-                        self.detected_equipments_zones[id] = self.extract_zones_coordinates(box)
-                    case 1:
-                        # Class: 'extratext_zone'
-                        id = int(box.id[0].item())
-                        self.detected_extratext_zones[id] = self.extract_zones_coordinates(box)
-                    case 2:
-                        # Class: 'linktext_zone'
-                        id = int(box.id[0].item())
-                        self.detected_linktext_zones[id] = self.extract_zones_coordinates(box)
-                    case _:
-                        continue
-                
-        # TODO: Remove the print()
-        cprint("Equipments zones detection done", 'green')
+
+        if self.use_tiling(image):
+            # Very large diagram: overlapping tiles, merged in global coordinates
+            for detection in self.tiled_predict(model, image):
+                self.store_zone(detection['cls'], detection['id'], self.zone_coordinates(detection['xyxy'], detection['xywh']))
+        else:
+            # Detection des equipements
+            # persist=False: the tracker is reset, the shared model does not keep the ids of the previous image
+            results = model.track(image, persist=False)
+
+            for result in results:
+                for box in result.boxes:
+                    self.store_zone(int(box.cls[0]), int(box.id[0].item()), self.extract_zones_coordinates(box))
+
+        return self.detected_equipments_zones, self.detected_linktext_zones, self.detected_extratext_zones
+
+    def store_zone(self, cls, id, coordinates):
+        """Range la zone detectee dans le dictionnaire de sa classe"""
+        match cls:
+            case 0:
+                # Class: 'equipment_zone'
+                self.detected_equipments_zones[id] = coordinates
+            case 1:
+                # Class: 'extratext_zone'
+                self.detected_extratext_zones[id] = coordinates
+            case 2:
+                # Class: 'linktext_zone'
+                self.detected_linktext_zones[id] = coordinates
     
     def extract_zones_coordinates(self, box):
 
         # Extract the coordinates of the box
-        x1, y1, x2, y2 = box.xyxy[0]
-        x1, x2, y1, y2 = int(x1.item()), int(x2.item()), int(y1.item()), int(y2.item())
+        return self.zone_coordinates(box.xyxy[0].tolist(), box.xywh[0].tolist())
+
+    def zone_coordinates(self, xyxy, xywh):
+        x1, y1, x2, y2 = xyxy
+        x1, x2, y1, y2 = int(x1), int(x2), int(y1), int(y2)
+
+        x, y, w, h = xywh
+        x, y, w, h = int(x), int(y), int(w), int(h)
+
+        return {'points':((x1, y1), (x2, y2)), 'box': (x, y, w, h)}
+
+    def cached_stage(self, stage, model, params, compute):
+        """Sortie brute d'une etape d'inference, lue dans le cache si l'etape a deja tourne sur la meme image
+        avec le meme modele et les memes parametres, calculee (puis gardee) sinon"""
+        if not self.useInferenceCache:
+            return compute()
+
+        modelDigest = model_registry.file_digest(self.AI_model_path(model)) if model else None
+        key = inference_cache.key(stage, self.image_digest(), modelDigest, dict(params, backend=self.inferenceBackend))
 
-        x, y, w, h = box.xywh[0]
-        x, y, w, h = int(x.item()), int(y.item()), int(w.item()), int(h.item())
+        value = inference_cache.get(key)
+        if value is not None:
+            cprint(f"{stage}: result read from the inference cache", 'green')
+            return value
 
-        return {'points':((x1, y1), (x2, y2)), 'box': (x, y, w, h)}   
+        value = compute()
+        try:
+            inference_cache.put(key, value)
+        except OSError as e:
+            cprint(f"Inference cache not updated: {e}", 'yellow')
+        return value
+
+    def image_digest(self):
+        """Empreinte sha256 de l'image (calculee une fois tant que le fichier ne change pas)"""
+        return model_registry.file_digest(self.imagePath)
+
+    def tiling_params(self):
+        """Parametres des etapes zones et links dans la cle du cache: le mode de tuilage et, si il peut servir,
+        les reglages des tuiles (une entree calculee avec d'autres reglages n'est pas reutilisee)"""
+        return {'tiled': self.tiledInference, 'tiling': tiling_parameters() if self.tiledInference is not False else None}
+
+    def use_tiling(self, image):
+        """Detection par tuiles: selon self.tiledInference (True, False, ou None pour les images tres grandes)"""
+        if self.tiledInference is None:
+            return max(image.shape[:2]) >= TILING_MIN_SIZE
+        return self.tiledInference
+
+    def tiled_predict(self, model, image):
+        """Detection sur des tuiles qui se chevauchent, traitees par lots
+
+        Les boites sont ramenees dans les coordonnees de l'image, les morceaux coupes par les bords des tuiles
+        sont fusionnes, les doublons des zones de chevauchement supprimes (NMS), puis les ids attribues."""
+        height, width = image.shape[:2]
+        tiles = tile_grid(width, height)
+
+        detections = []
+        for start in range(0, len(tiles), TILE_BATCH_SIZE):
+            batch = tiles[start:start + TILE_BATCH_SIZE]
+            results = model.predict([image[y1:y2, x1:x2] for (x1, y1, x2, y2) in batch], imgsz=TILE_SIZE, verbose=False)
+            for tile, result in zip(batch, results):
+                detections.extend(self.tile_detections(result, tile, width, height))
+
+        cprint(f"Tiled inference: {len(tiles)} tiles, {len(detections)} raw detections", 'green')
+        return assign_ids(non_max_suppression(merge_seams(detections)))
+
+    def tile_detections(self, result, tile, width, height):
+        """Detections d'une tuile dans les coordonnees de l'image entiere"""
+        x0, y0 = tile[0], tile[1]
+        detections = []
+
+        if result.obb is not None:
+            obb = result.obb
+            for corners, (x, y, w, h, r), conf, cls in zip(obb.xyxyxyxy.tolist(), obb.xywhr.tolist(), obb.conf.tolist(), obb.cls.tolist()):
+                corners = [(cx + x0, cy + y0) for cx, cy in corners]
+                xyxy = (min(c[0] for c in corners), min(c[1] for c in corners), max(c[0] for c in corners), max(c[1] for c in corners))
+                cuts = truncated_edges(xyxy, tile, width, height)
+                detections.append({'cls': int(cls), 'conf': conf, 'xyxy': xyxy, 'corners': corners, 'xywhr': (x + x0, y + y0, w, h, r),
+                                   'truncated': bool(cuts), 'cuts': cuts})
+        else:
+            boxes = result.boxes
+            for (x1, y1, x2, y2), conf, cls in zip(boxes.xyxy.tolist(), boxes.conf.tolist(), boxes.cls.tolist()):
+                xyxy = (x1 + x0, y1 + y0, x2 + x0, y2 + y0)
+                cuts = truncated_edges(xyxy, tile, width, height)
+                detections.append({'cls': int(cls), 'conf': conf, 'xyxy': xyxy,
+                                   'xywh': ((xyxy[0] + xyxy[2]) / 2, (xyxy[1] + xyxy[3]) / 2, x2 - x1, y2 - y1),
+                                   'truncated': bool(cuts), 'cuts': cuts})
+        return detections
     
-    def equipment_detection(self, modelName:str):
-        """Detection des equipements dans les zones detectees"""
+    def equipment_detection(self, modelName:str, batchSize=None):
+        """Detection des equipements dans les zones detectees
+
+        Avec batchSize > 1, les zones sont classees par lots (ultralytics les redimensionne lui-meme),
+        au lieu d'un passage du modele par zone."""
 
         zones = self.detected_equipments_zones # Detected zones
-        imagePath = self.imagePath  # Image path
-        image = cv2.imread(imagePath)   # Reading the image with cv2
+        batchSize = self.equipmentBatchSize if batchSize is None else batchSize
+
+        self.equipments = self.cached_stage('equipment', modelName, {'zones': zones, 'batchSize': batchSize, 'letterbox': 'ultralytics'},
+                                            lambda: self.run_equipment_detection(modelName, zones, batchSize))
+        print(self.equipments)
+        cprint("Equipments detection Done", 'green')
+
+    def run_equipment_detection(self, modelName, zones, batchSize):
+        """Classe le contenu de chaque zone d'equipement: {zone_id: classe}"""
+        image = self.image_context.image   # Decoded once for every stage
 
         equipments = {}
-        modelPath = self.AI_model_path(modelName)
+        model = self.load_model(modelName)
+
+        if batchSize > 1:
+            equipments = self.batched_equipment_classification(model, image, zones, batchSize)
+        else:
+            for index in zones:
+                equipments[index] = {}
+                regionOfInterest = self.crop_zone(image, zones[index]['box'])
+
+                results = model(regionOfInterest)
+                for result in results:
+                    cls = self.equipment_class(result)
+                    if cls is not None:
+                        equipments[index] = cls
+
+        return equipments
+
+    def batched_equipment_classification(self, model, image, zones, batchSize):
+        """Classe les zones d'equipements par lots de `batchSize` images
 
-        model= YOLO(modelPath)
+        Les zones sont passees telles quelles, a la taille d'image du modele comme zone par zone: ultralytics
+        les redimensionne (letterbox) avec son propre pre-traitement. Seule la bordure peut changer: les zones
+        d'un lot de formes differentes sont completees en carre, une zone seule au multiple de 32 le plus proche."""
 
+        equipments = {index: {} for index in zones}
+
+        crops = []
         for index in zones:
-            equipments[index] = {}
-            (x, y, w, h) = zones[index]['box']
-            # regionOfInterest = image[y:y+h, x:x+w]  # Rognage de la zone
-            xOrigin = x - w/2
-            yOrigin = y - h/2
-            regionOfInterest = image[int(yOrigin) : int(y+h), int(xOrigin) : int(x+w)]
-
-            results = model(regionOfInterest)
-            for result in results:
-                if len(result.boxes.cls) > 0:
-                    classes = result.names
-                    classe = int(result.boxes.cls[0].item())
+            regionOfInterest = self.crop_zone(image, zones[index]['box'])
+            if regionOfInterest.size == 0:
+                continue
+            crops.append((index, regionOfInterest))
 
-                    cls = classes.get(classe)
-                    if cls == 'pcs':
-                        cls = 'pc'
+        for start in range(0, len(crops), batchSize):
+            batch = crops[start:start + batchSize]
+            results = model([crop for _, crop in batch], verbose=False)
 
+            # The results are in the same order as the images of the batch
+            for (index, _), result in zip(batch, results):
+                cls = self.equipment_class(result)
+                if cls is not None:
                     equipments[index] = cls
-        
-        self.equipments = equipments
-        print(self.equipments)
-        cprint("Equipments detection Done", 'green')
+
+        return equipments
+
+    def equipment_class(self, result):
+        """Nom de la classe la plus probable d'un resultat YOLO, None si rien n'a ete detecte"""
+        if len(result.boxes.cls) == 0:
+            return None
+
+        classes = result.names
+        classe = int(result.boxes.cls[0].item())
+
+        cls = classes.get(classe)
+        if cls == 'pcs':
+            cls = 'pc'
+        return cls
+
+    def crop_zone(self, image, box, gray=False):
+        """Rognage de la zone (x, y, w, h) dans l'image (vue sans copie)
+
+        Pour l'image du schema, la zone est prise dans le contexte d'image (en niveaux de gris si gray=True,
+        calcules une seule fois); les autres images sont converties si besoin."""
+        if self._imageContext is not None and self._imageContext.owns(image):
+            return self._imageContext.roi(box, gray)
+        regionOfInterest = crop_box(image, box)
+        if gray and regionOfInterest.ndim == 3 and regionOfInterest.size:
+            return cv2.cvtColor(regionOfInterest, cv2.COLOR_BGR2GRAY)
+        return regionOfInterest
 
     def create_masks(self, image):
         """Creation des masques pour les zones detectees"""
@@ -236,39 +521,54 @@ class TopologyData:
         
         Un model de Oriented Bounding Box est utilise pour detecter les zones des liens, puis les boxes sont transformees en lignes"""
 
-        image = self.imagePath
+        self.links = self.cached_stage('links', model, self.tiling_params(), lambda: self.run_links_detection(model))
+        self._linkIndex = LinkIndex(self.links)
 
-        # Chargement du modele
-        model = YOLO(self.AI_model_path(model))
+        cprint("Links detection Done", 'green')
+
+        self.link_equipments()
 
-        results = model.track(image)
+    def run_links_detection(self, model):
+        """Detection des liens avec YOLO (OBB): {link_id: {'points': (pt1, pt2), 'box': (x, y, w, h, r)}}"""
+        image = self.image_context.image
+
+        # Chargement du modele
+        model = self.load_model(model)
 
         self.links = {}
-        for result in results:
-          for obbox in result.obb:
-            (x1, y1), (x2, y2), (x3, y3), (x4, y4) = obbox.xyxyxyxy[0]
-            x, y, w, h, r = obbox.xywhr[0]
+        if self.use_tiling(image):
+            for detection in self.tiled_predict(model, image):
+                self.add_link(detection['id'], detection['corners'], detection['xywhr'])
+        else:
+            results = model.track(image, persist=False)
 
-            ## Extraction des valeurs des tenseurs
-            # Extraction des coordonnees quatre points constituants la box
-            x1, x2, x3, x4 = int(x1.item()), int(x2.item()), int(x3.item()), int(x4.item())
-            y1, y2, y3, y4 = int(y1.item()), int(y2.item()), int(y3.item()), int(y4.item())
+            for result in results:
+              for obbox in result.obb:
+                self.add_link(int(obbox.id), obbox.xyxyxyxy[0].tolist(), obbox.xywhr[0].tolist())
 
-            # En fonction de la hauteur et de la largeur
-            x, y, w, h, r = int(x.item()), int(y.item()), int(w.item()), int(h.item()), int(r.item())
+        return self.links
+     
+    def add_link(self, id, corners, xywhr):
+        """Transforme la box orientee d'un lien en ligne et l'ajoute au dictionnaire des liens"""
+        (x1, y1), (x2, y2), (x3, y3), (x4, y4) = corners
+        x, y, w, h, r = xywhr
 
-            ## Determination des deux points delimittants la droite
-            points = [(x1, y1), (x2, y2), (x3, y3), (x4, y4)]
-            pt1 = min(points, key=lambda p: p[1])
-            pt2 = max(points, key=lambda p: p[1])
+        ## Extraction des valeurs
+        # Extraction des coordonnees quatre points constituants la box
+        x1, x2, x3, x4 = int(x1), int(x2), int(x3), int(x4)
+        y1, y2, y3, y4 = int(y1), int(y2), int(y3), int(y4)
 
-            ## Ajout des valeurs dans le dictionnaire des liens
-            self.links[int(obbox.id)] = {'points': (pt1, pt2), 'box': (x, y, w, h, r)}
+        # En fonction de la hauteur et de la largeur
+        x, y, w, h, r = int(x), int(y), int(w), int(h), int(r)
 
-        cprint("Links detection Done", 'green')
+        ## Determination des deux points delimittants la droite
+        points = [(x1, y1), (x2, y2), (x3, y3), (x4, y4)]
+        pt1 = min(points, key=lambda p: p[1])
+        pt2 = max(points, key=lambda p: p[1])
+
+        ## Ajout des valeurs dans le dictionnaire des liens
+        self.links[id] = {'points': (pt1, pt2), 'box': (x, y, w, h, r)}
 
-        self.link_equipments()
-     
     def map_links_to_midle_text(self, extractedText):
         """
         For each link, find the closest text zone and associate the text.
@@ -277,34 +577,11 @@ class TopologyData:
         Le texte est surtut considere comme l'adresse reseau ou le protocole
         """
 
-        links = self.links
         linkText = {}
 
-        for index in links:
-            linkPoints = links[index]['points']
-            linkLine = LineString(linkPoints)
-
-            minDistance = float('inf')
-            closestZoneId = None
-
-            for zoneId, zoneData in self.detected_linktext_zones.items():
-                zonePolygon = Polygon(zoneData['points'])
-                
-                # Skip invalid polygons
-                if not zonePolygon.is_valid or zonePolygon.is_empty:
-                    continue
-
-                # Find the closest point on the link to the zone boundary
-                centroid = zonePolygon.centroid
-                if centroid.is_empty:
-                    continue
-                    
-                closestPointOnZone = linkLine.interpolate(linkLine.project(centroid))
-                distance = closestPointOnZone.distance(zonePolygon.boundary)
-                
-                if distance < minDistance:
-                    minDistance = distance
-                    closestZoneId = zoneId
+        # The zones are measured from their box ('points' only holds two corners)
+        for index in self.links:
+            closestZoneId, _ = self.closest_text_zone(index)
 
             # Assign text if found
             if closestZoneId is not None and closestZoneId in extractedText:
@@ -455,30 +732,15 @@ class TopologyData:
         - ip_address
         - protocol
         - vlan
-        - interface"""
-
-        model_path = self.AI_model_path("bert-finetuned") # ./AI_models/bert-finetuned
-
-        # Load tokenizer and model from local folder
-        tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
-        model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True)
-
-        # Add mapping from label ids to human-readable tags
-        label_names = {
-            0: "hostname",
-            1: "interface",
-            2: "ip_address",
-            3: "protocol",
-            4: "vlan"
-        }
-        model.config.id2label = {i: name for i, name in label_names.items()}
-        model.config.label2id = {name: i for i, name in label_names.items()}
+        - interface
+        
+        Accepte un texte ou une liste de textes, classes par lots avec le modele charge une seule fois."""
 
-        # Create pipeline using the loaded objects
-        classifier = pipeline("text-classification", model=model, tokenizer=tokenizer)
-        result = classifier(text)
+        classifier = self.load_bert_classifier()
 
-        return result
+        if isinstance(text, list):
+            return classifier.classify(text)
+        return classifier.classify([text])
 
     def filter_interfaces(self):
         """Filtrage du texte detecte pret des ports pour ne garder que le texte qui correspond a la sytax des interfaces et des adresses IP"""
@@ -507,165 +769,59 @@ class TopologyData:
         Supporte: f0/0, gi0/0, s0/0, eth0, etc.
         Gère également les erreurs OCR où '0' est lu comme 'o' ou 'O'.
         """
-        substitutions = {
-            r'(?i)^(?:GigabitEthernet|Gig|Gi|g)([\doO]+(?:/[\doO]+){1,2})$': r'GigabitEthernet\1',
-            r'(?i)^(?:FastEthernet|FastEth|Fa|fo|f)([\doO]+(?:/[\doO]+){1,2})$': r'FastEthernet\1',
-            r'(?i)^(?:TenGigabitEthernet|TenGig|Te)([\doO]+(?:/[\doO]+){1,2})$': r'TenGigabitEthernet\1',
-            r'(?i)^(?:Ethernet|Eth|e)([\doO]+(?:/[\doO]+){0,2})$': r'Ethernet\1',
-            r'(?i)^(?:Serial|Se|s)([\doO]+(?:/[\doO]+){1,3})$': r'Serial\1',
-            r'(?i)^(?:Loopback|Lo)([\doO]+)$': r'Loopback\1',
-            r'(?i)^(?:Vlan|Vl|v)([\doO]+)$': r'Vlan\1',
-            r'(?i)^(?:Port-channel|Po)([\doO]+)$': r'Port-channel\1',
-        }
-
-        for pattern, replacement in substitutions.items():
-            match = re.match(pattern, text)
-            if match:
-                # Extract the numeric part (Always group 1)
-                numeric_part = match.group(1)
-                # Correction OCR : remplacer 'o' et 'O' par '0' uniquement dans la partie numérique
-                cleaned_numeric = numeric_part.replace('o', '0').replace('O', '0')
-                
-                # Extract the standard prefix from the replacement string
-                # e.g. r'GigabitEthernet\1' -> 'GigabitEthernet'
-                prefix = replacement.replace(r'\1', '')
-                
-                return prefix + cleaned_numeric
-        return text  # Retourne tel quel si aucune correspondance
+        return rule_classifier.normalise_interfaces_names(text)
 
     def is_interface(self, text):
         """
         Vérifie si le nom correspond à une interface réseau Cisco typique.
         """
-        normalise = True
-        normalText = self.normalise_interfaces_names(text) if normalise else text # Normalisation of the interface text before testing if it is a valid interface name.
-        validPatterns = [
-            r'^GigabitEthernet\s?\d+(/\d+){1,2}$',
-            r'^FastEthernet\s?\d+(/\d+){1,2}$',
-            r'^Serial\s?\d+(/\d+){1,3}$',
-            r'^Loopback\d+$',
-            r'^Ethernet\s?\d+(/\d+){0,2}$',
-            r'^Port-channel\s?\d+$',
-            r'^TenGigabitEthernet\s?\d+(/\d+){1,2}$'
-        ]
-        
-        return any(re.match(pattern, normalText) for pattern in validPatterns)
+        return rule_classifier.is_interface(text)
 
     def is_hostname(self, text):
         """Checks if the text corresponds to a valid hostname."""
-
-        if text.isdigit():
-            return False
-
-        # Alphanumeric, hyphens, underscores, dots (for FQDN). Should usually start with a letter/digit.
-        pattern = r'^[a-zA-Z0-9]([a-zA-Z0-9\-\_]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-\_]{0,61}[a-zA-Z0-9])?)*$'
-        return bool(re.match(pattern, text))
+        return rule_classifier.is_hostname(text)
 
     def is_protocol(self, text):
         """Checks if the text is a known network protocol."""
-        protocols = [
-            'OSPF', 'BGP', 'EIGRP', 'RIP', 'ISIS', 'HSRP', 'VRRP', 'GLBP', 
-            'STP', 'RSTP', 'MSTP', 'LACP', 'PAgP', 'DHCP', 'DNS', 'NTP', 
-            'SNMP', 'SSH', 'Telnet', 'HTTP', 'HTTPS', 'FTP', 'TFTP', 'ICMP', 
-            'TCP', 'UDP', 'GRE', 'IPsec', 'MPLS', 'LDP'
-        ]
-        return text.upper() in protocols
+        return rule_classifier.is_protocol(text)
 
     def is_vlan(self, text):
         """Checks if the text looks like a VLAN identifier."""
-        # e.g., "10", "VLAN 10", "vlan100"
-        pattern = r'^(VLAN\s?)?\d{1,4}$'
-        return bool(re.match(pattern, text, re.IGNORECASE))
+        return rule_classifier.is_vlan(text)
 
     def is_complete_ip(self, text):
         """Checks if the text is a complete IPv4 address (with optional CIDR)."""
-        # 4 octets
-        pattern = r'^((25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)(/(3[0-2]|[12]?[0-9]))?$'
-        return bool(re.match(pattern, text))
+        return rule_classifier.is_complete_ip(text)
 
     def is_incomplete_ip(self, text):
-        """Checks if the text is an incomplete IPv4 address segment."""
-        # Matches patterns like .1, .1.1, 1.2, .1/24 etc.
-        # Cases:
-        # 1. Starts with dot: .1, .1.2, .1.2.3, .1/24
-        # 2. X.Y (at least one dot) but not complete 4 octets? 
-        #    Note: 1.2 could be a version number. But in network context we might accept it.
-        #    Let's restrict "No starting dot" to at least digits.digits
-        
-        # Pattern 1: Starts with dot, followed by octet, optionally more dot-octets, optional CIDR
-        p1 = r'^\.(\d{1,3})(\.\d{1,3})*(/(3[0-2]|[12]?[0-9]))?$'
-        
-        # Pattern 2: Digits.Digits... (partial)
-        p2 = r'^(\d{1,3}\.)+\d{1,3}(/(3[0-2]|[12]?[0-9]))?$'
-
-        # Pattern 3: Simple number (1-3 digits) - e.g. "2", "10"
-        # This is for when OCR misses the dot or it's just the host part
-        p3 = r'^\d{1,3}$'
-        
-        if re.match(p1, text) or re.match(p3, text):
-            return True
-            
-        if re.match(p2, text):
-            # Check if it is NOT a complete IP (4 octets)
-            if text.count('.') == 3:
-                 return False
-            return True
-            
-        return False
+        """Checks if the text is an incomplete IPv4 address segment (.1, .1.1, 1.2, .1/24, 10...)."""
+        return rule_classifier.is_incomplete_ip(text)
     
     def is_ip(self, text):
         """Verifie si le texte correspond a une adresse IP"""
-
-        patterns = [
-            r'\b(?:\d{1,3}\.){1,3}\d{1,3}\b',
-            r'\b(?:\.\d{1,3}\.){1,2}\d{1,3}\b',
-            r'\b(?:\.\d{1,3})'
-        ]
-
-        validIPPatterns = re.compile('|'.join(patterns))
-
-        return validIPPatterns.fullmatch(text) 
+        return rule_classifier.is_ip(text)
 
     def is_ip_with_mask(self, text):
         """Determine si le texte est l'adresse du reseau"""
-        
-        try:
-            ipaddress.IPv4Network(text, strict=False)
-            return True
-        except ValueError:
-            return False
+        return rule_classifier.is_ip_with_mask(text)
 
     def classify_text(self, texts):
-        """Classify the text"""
+        """Classify the text
+
+        The patterns are compiled once by the shared RuleClassifier. With the 'cascade' classifier,
+        only the texts the rules can not settle are sent to the BERT model."""
         if isinstance(texts, list):
-            result = []
-            for index, text in enumerate(texts):
-                if self.is_interface(text): result.append((index, 'interface'))
-                elif self.is_hostname(text): result.append((index, 'hostname'))
-                elif self.is_protocol(text): result.append((index, 'protocol'))
-                elif self.is_incomplete_ip(text): result.append((index, 'incomplete_ip'))
-                elif self.is_vlan(text): result.append((index, 'vlan'))
-                elif self.is_ip(text): result.append((index, 'ip'))
-                elif self.is_ip_with_mask(text): result.append((index, 'ip'))
-                else: result.append((index, 'other'))
-            
-            return result
-        
+            if self.textClassifier == 'cascade':
+                return list(enumerate(self.cascade.classify(texts)))
+            return list(enumerate(rule_classifier.classify(texts)))
         else:
-            text = texts
-            if self.is_hostname(text): return "hostname"
-            elif self.is_protocol(text): return "protocol"
-            elif self.is_incomplete_ip(text): return "incomplete_ip"
-            elif self.is_vlan(text): return "vlan"
-            elif self.is_ip(text): return "ip"
-            elif self.is_ip_with_mask(text): return "ip"
-            elif self.is_interface(text): return "interface"
-            else: return "other"
+            if self.textClassifier == 'cascade':
+                return self.cascade.classify([texts], rule_classifier.textOrder)[0]
+            return rule_classifier.classify_one(texts)
 
     def map_links_to_port_text(self):
         """Lie chaque extremite d'un lien avec le texte qui s'y rapporte"""
 
-        self.links
         linkedEquipments = self.linkedEquipments
         texts = self.extractedTextForEquipmentZones
         equipmentZone = self.detected_equipments_zones
@@ -684,11 +840,13 @@ class TopologyData:
         for zone in zoneWithLinks:
             equipmentInterfaces[zone] = {'interfaces': []}
             interfacesList = equipmentInterfaces[zone]['interfaces']
-            for text, textCoordinates in texts[zone].values():
-                if self.is_valid_interface(text): # Si le texte est le nom d'une interface
+            for entry in texts.get(zone, {}).values():
+                text = entry['text']
+                textCoordinates = self.text_box(equipmentZone[zone]['box'], entry['coordinates'])
+                if self.is_interface(text): # Si le texte est le nom d'une interface
                     _, closestLink = self.find_nearest_link(zone, zoneWithLinks, self.links, textCoordinates)
                     interfacesList.append((closestLink, text, 'int'))
-                elif self.is_valid_ip(text): # Sinon si le texte est une adresse IP
+                elif self.is_ip(text): # Sinon si le texte est une adresse IP
                     _, closestLink = self.find_nearest_link(zone, zoneWithLinks, self.links, textCoordinates)
                     interfacesList.append((closestLink, text, 'ip'))
                 else: # Sinon: Considerer le texte comme le hostname de l'equipement
@@ -696,20 +854,22 @@ class TopologyData:
 
         self.equipmentInterfaces = equipmentInterfaces
                 
+    def text_box(self, zoneBox, coordinates):
+        """Boite (x, y, w, h) dans l'image du contour d'un texte lu par l'OCR (coordonnees relatives a la zone)"""
+        x, y, w, h = zoneBox
+        points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        xmin, ymin = points.min(axis=0)
+        xmax, ymax = points.max(axis=0)
+        return (x - w/2 + xmin, y - h/2 + ymin, xmax - xmin, ymax - ymin)
+
     def find_nearest_link(self, zone, zoneWithLinks, links, textCoordinates):
-        minDistance = float('inf')
-        closestLink = None
+        """[distance, lien] du lien de la zone dont une extremite est la plus proche du centre du texte (x, y, w, h)
+
+        Les extremites des liens sont lues dans l'index des liens (LinkIndex), toutes les distances en un calcul."""
         x, y, w, h = textCoordinates
         zoneCenter = [x + w // 2, y + h // 2]
-        for link in zoneWithLinks[zone]:
-            (x1, y1), (x2, y2) = links[link]['points']
-            distance1 = math.sqrt((x1 - zoneCenter[0])**2 + (y1 - zoneCenter[1])**2)
-            distance2 = math.sqrt((x2 - zoneCenter[0])**2 + (y2 - zoneCenter[1])**2)
-            distance = min(distance1, distance2)
-            if distance < minDistance:
-                minDistance = distance
-                closestLink = link
-
+        linkIndex = self.link_index if links is self.links else LinkIndex(links)
+        closestLink, minDistance = linkIndex.nearest_endpoint(zoneCenter, zoneWithLinks[zone])
         return [minDistance, closestLink]
 
     def link_equipments(self):
@@ -718,12 +878,15 @@ class TopologyData:
         detectedLinks = self.links
         detectedZones = self.detected_equipments_zones
 
+        # Distances between every link and every zone in one call: (links, zones)
+        linkIds = self.link_index.ids
+        distances = self.link_index.rectangle_distances(box_rectangles([zone['box'] for zone in detectedZones.values()]))
+
         zoneWithLinks = {}
-        for index in detectedZones:
+        for column, index in enumerate(detectedZones):
             zoneWithLinks[index] = []
-            zone = detectedZones[index]
-            zone_points = self.convert_width_height_to_points(zone['box'])
-            closestLinks = self.closest_to_the_box(zone_points, detectedLinks.keys(), True)
+            # Links touching the zone (less than 2 pixels), as closest_to_the_box(..., multiple=True)
+            closestLinks = [(linkIds[row], float(distances[row, column])) for row in np.flatnonzero(distances[:, column] < 2)]
             # (x, y, w, h) = zone['box']
             # zoneCenter = (x + w // 2, y + h // 2)
             # halfWay = max(w // 2, h // 2) + 4
@@ -744,17 +907,10 @@ class TopologyData:
         
         self.zoneWithLinks = zoneWithLinks
 
-        # linked equipments
-        linked = {}
-        zones = [zone for zone in zoneWithLinks.keys()]
-        for i in range(len(zoneWithLinks.keys())-1):
-            zone1 = zoneWithLinks[zones[i]]
-            zone2 = zoneWithLinks[zones[i+1]]
-
-            # Check if the zones are linked
-            link = self.are_zones_linked(zone1, zone2)
-            if link:
-                linked[link] = (i, i+1)
+        # linked equipments: each end of every link is attached to its nearest equipment zone,
+        # the links joining two different zones are kept as {link_id: (zoneA, zoneB)}
+        self.linkEndpoints = self.link_endpoints(detectedLinks, detectedZones)
+        linked = {link: zones for link, zones in self.linkEndpoints.items() if None not in zones and zones[0] != zones[1]}
 
         cprint(f'LINKED', 'green')
         cprint(linked, 'green')
@@ -766,12 +922,26 @@ class TopologyData:
         self.linkedEquipments = linked
 
     def are_zones_linked(self, zone1, zone2):
-        """Detect linked zones in the image"""
-        for link1 in zone1:
-            for link2 in zone2:
-                if link1[0] == link2[0]:
-                    return link1
-            
+        """Detect linked zones in the image
+
+        Renvoie le premier lien (dans l'ordre des liens) qui relie les deux zones d'equipements, lu dans
+        self.linkedEquipments ({link_id: (zoneA, zoneB)}), None si elles ne sont pas reliees."""
+        for link, zones in getattr(self, "linkedEquipments", {}).items():
+            if zone1 in zones and zone2 in zones:
+                return link
+
+    def link_endpoints(self, links, zones, tolerance=LINK_ENDPOINT_TOLERANCE):
+        """Table complete {link_id: (zoneA, zoneB)} des zones d'equipements aux deux extremites de chaque lien
+
+        Les 2 x L extremites sont rattachees en une passe a la zone la plus proche (index spatial des zones, O(L log Z)),
+        None si aucune zone n'est a moins de `tolerance` pixels."""
+        if not links:
+            return {}
+
+        linkIndex = self.link_index
+        nearestZones = ZoneIndex(zones).nearest(linkIndex.segments.reshape(-1, 2), tolerance)
+        return {id: (nearestZones[2 * row], nearestZones[2 * row + 1]) for row, id in enumerate(linkIndex.ids)}
+
     def closest_to_the_box(self, box, linksList, multiple = False):
         """Determines the shortest path between the text box and the links
 
@@ -783,43 +953,23 @@ class TopologyData:
         - closestLink: the id of the closest link
         - distance: the distance between the box and the closest link
         """
-        links = self.links
         ((x1, y1), (x2, y2), (x3, y3), (x4, y4)) = box
         box = [(x1, y1), (x2, y2), (x3, y3), (x4, y4)] # Coordinates of the points of the box
-        rectangle = Polygon(box) # Rectangle representing the box
 
-        # Initialisation of the minimum distance and the closest link
-        minDistance = float('inf')
-        closestLink = None
+        # Upright box: distances to every link at once (NumPy kernel)
+        rectangle = points_rectangle(box)
+        if rectangle is not None:
+            if not multiple:
+                return self.link_index.nearest_rectangle(rectangle, linksList)
+            return self.link_index.within_rectangle(rectangle, linksList, 2)
+
+        rectangle = Polygon(box) # Rectangle representing the box
 
+        # Tilted box (OCR polygon): the link lines are indexed once (STRtree), only the links near the box are measured
         if not multiple:
-            for linkIndex in linksList:
-                link = links[linkIndex]['points']
-                linkLine = LineString(link) # Line representing the link
-
-                # use nearest_points
-                p_rect, p_link = nearest_points(rectangle.boundary, linkLine)
-                distance = p_rect.distance(p_link)
-                if distance < minDistance:
-                    minDistance = distance
-                    closestLink = linkIndex
-
-            if closestLink is None:
-                return None, None
-            else:
-                return closestLink, minDistance
+            return self.link_index.nearest(rectangle.boundary, linksList)
         else:
-            closests = []
-            for index in linksList:
-                link = links[index]['points']
-                linkLine = LineString(link) # Line representing the link
-
-                # use nearest_points
-                p_rect, p_link = nearest_points(rectangle.boundary, linkLine)
-                distance = p_rect.distance(p_link)
-                if distance < 2:
-                    closests.append((index, distance))
-            return closests
+            return self.link_index.within(rectangle.boundary, linksList, 2)
 
     def create_links(self, linked):
         """Create links between zones and lines"""
@@ -828,12 +978,12 @@ class TopologyData:
     def OCR_on_detected_equipments_zones(self):
         """Perform OCR on the detected equipments on the image and save the results in the database"""
 
-        # Chargement de l'image
-        image = cv2.imread(self.imagePath)
+        # Image decodee une seule fois (partagee par toutes les etapes)
+        image = self.image_context.image
 
         # OCR on each detected zone
         # Or Targeted OCR
-        self.extractedTextForEquipmentZones = self.targeted_OCR(image, self.detected_equipments_zones)
+        self.extractedTextForEquipmentZones = self.targeted_OCR(image, self.detected_equipments_zones, kind='equipment')
 
         # classify text        
         # 1 Make a list of all the text
@@ -845,7 +995,8 @@ class TopologyData:
         print(f'all_text\n{all_text}')
 
         #2 Classify the list text
-        classes = self.classify_text(all_text)
+        with thread_budget.stage("Text classification"):
+            classes = self.classify_text(all_text)
         print(f'classes\n{classes}')
 
         #3 Put the classified text in the extractedTextForEquipmentZones
@@ -862,18 +1013,13 @@ class TopologyData:
     def OCR_on_detected_link_text_zones(self):
         """OCR on detected zones of text"""
 
-        imagePath = self.imagePath
         detectedTextZones = self.detected_linktext_zones
 
-        image = cv2.imread(imagePath)
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-        # Binarisation
-        _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV)
+        image = self.image_context.image
 
         # OCR on each detected zone
         # Or Targeted OCR        
-        extractedTextForLinks = self.targeted_OCR(image, detectedTextZones)
+        extractedTextForLinks = self.targeted_OCR(image, detectedTextZones, kind='link_text')
         
         # Link texts to related links
         self.textOnLinks = self.link_text_to_links(extractedTextForLinks)
@@ -884,107 +1030,368 @@ class TopologyData:
         # print(detectedTextZones)
         cprint("-----------------------------------")
 
-    def targeted_OCR(self, image, detected_zones):
+    def targeted_OCR(self, image, detected_zones, kind='equipment'):
+        """Use OCR on detected zones to extract the text in it (or read it from the inference cache)
+
+        - kind: 'equipment' (zones d'equipements) ou 'link_text' (zones de texte des liens)"""
+        ocrParams = {
+            'zones': detected_zones,
+            'kind': kind,
+            'mode': self.ocrMode,
+            'backend': self.ocrBackend,
+            'engines': ocr_engines_identity(),
+            'preprocessing': {engine: pipeline.config() for engine, pipeline in self.preprocessing.items()},
+            'cascade': {'tiers': OCR_CASCADE_TIERS, 'easyocr': EASYOCR_OPTIONS} if self.ocrMode == 'cascade' else None,
+            'min_score': OCR_MIN_SCORE,
+        }
+        return self.cached_stage('ocr', None, ocrParams, lambda: self.run_targeted_OCR(image, detected_zones, kind))
+
+    def run_targeted_OCR(self, image, detected_zones, kind='equipment'):
         """Use OCR on detected zones to extract the text in it
-        """
-        length = len(detected_zones)
-        step = length // 3
 
-        # Initialize the dictionnaries where will be saved the results
-        result1 = {}
-        result2 = {}
-        result3 = {}
-        
-        # Instantiate the reader once
-        # Instantiate separate PaddleOCR instances for each thread to ensure thread safety
-        # Also disable MKLDNN to avoid PIR conversion errors
-        reader_1 = PaddleOCR(use_angle_cls=True, lang='en', enable_mkldnn=False, return_word_box=True)
-        reader_2 = PaddleOCR(use_angle_cls=True, lang='en', enable_mkldnn=False, return_word_box=True)
-        reader_3 = PaddleOCR(use_angle_cls=True, lang='en', enable_mkldnn=False, return_word_box=True)
-
-        # Create a thread to do the classification on each part of the list
-        thread_1 = threading.Thread(target=self.paddleOCR, args=(image, dict(islice(detected_zones.items(), 0, step)), result1, reader_1))
-        thread_2 = threading.Thread(target=self.paddleOCR, args=(image, dict(islice(detected_zones.items(), step, step*2)), result2, reader_2))
-        thread_3 = threading.Thread(target=self.paddleOCR, args=(image, dict(islice(detected_zones.items(), step*2, length)), result3, reader_3))
-
-        # Start the threads
-        thread_1.start()
-        thread_2.start()
-        thread_3.start()
-        
-        # Wait for all the threads to finish their work before continuing
-        thread_1.join()
-        thread_2.join()
-        thread_3.join()
+        In 'recognition' mode the single-line link text zones only go through the recognition model, in batches,
+        and only the zones holding several lines of text are read with the full PaddleOCR pipeline.
+        The recognition model gives the whole zone as the text coordinates: the equipment zones, whose text
+        coordinates place the interfaces and IP addresses on the links, always go through the full pipeline.
+
+        The zones are put in a shared work queue: each worker thread pulls the next zone (or batch of
+        single-line zones) as soon as it is free, borrowing a reader from the pool for that item only.
+        With the 'processes' backend the same work items are sent to a pool of processes instead.
 
-        extractedText = dict(chain(result1.items(), result2.items(), result3.items()))
+        In 'cascade' mode the light engines read the zones first: only the zones they could not settle go to PaddleOCR.
+        """
+        settled, zones = {}, detected_zones
+        if self.ocrMode == 'cascade':
+            settled, zones = self.cascaded_OCR(image, detected_zones, kind)
+
+        if self.ocrMode in ('recognition', 'cascade') and kind != 'equipment':
+            singleLineZones, multiLineZones, emptyZones = self.split_zones_by_lines(image, zones)
+        else:
+            singleLineZones, multiLineZones, emptyZones = {}, zones, {}
+
+        # Work items: one per multi-line zone, one per batch of single-line zones
+        workItems = [('full', {index: multiLineZones[index]}, kind) for index in multiLineZones]
+        singleLineItems = list(singleLineZones.items())
+        for start in range(0, len(singleLineItems), OCR_RECOGNITION_BATCH_SIZE):
+            workItems.append(('recognition', dict(singleLineItems[start:start + OCR_RECOGNITION_BATCH_SIZE]), kind))
+
+        if not workItems:
+            results, workers = {}, 0
+        elif self.ocrBackend == 'processes':
+            workers = self.ocr_workers_count(len(workItems), OCR_POOL_SIZE)
+            results = self.process_pool_OCR(image, workItems, workers)
+        else:
+            # The PaddleOCR readers are lent by the process-wide pools, created once and reused by
+            # the following calls and extractions
+            pools = {'full': paddle_reader_pool(), 'recognition': recognizer_pool()}
+            workers = self.ocr_workers_count(len(workItems), pools['full'].size)
+            results = self.threaded_OCR(image, workItems, workers, pools)
+            for pool in pools.values():
+                pool.report()
+
+        results.update(settled)
+        # Zones without any line of text: nothing to read
+        results.update({index: {} for index in emptyZones})
+
+        # Merge in the order of the detected zones, whatever the order the workers finished in
+        extractedText = {index: results[index] for index in detected_zones if index in results}
+        cprint(f"OCR: {len(singleLineZones)} zones recognized, {len(multiLineZones)} zones with full detection, "
+               f"{len(emptyZones)} zones without text, {workers} workers", 'red')
         cprint("Extracted text", 'red')
         print(extractedText)
         cprint("@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@", 'red')
             
         return extractedText
 
-    def easyOCR(self, image, zones, result, reader_instance):
+    def cascaded_OCR(self, image, zones, kind='equipment'):
+        """Lecture des zones par les moteurs legers, du moins cher au plus cher
+
+        Une zone est reglee par le premier moteur dont la confiance atteint son seuil et dont tous les textes
+        correspondent a une regle de classification (voir is_settled). Les zones passent par la meme file de taches
+        (threads ou processus) que PaddleOCR, dans le budget de coeurs, les lecteurs easyocr etant pretes par leur pool.
+        Renvoie (textes des zones reglees, zones restantes)."""
+        workItems = [('cascade', {index: zones[index]}, kind) for index in zones]
+        if not workItems:
+            return {}, {}
+        workers = self.ocr_workers_count(len(workItems), thread_budget.cores)
+        if self.ocrBackend == 'processes':
+            results = self.process_pool_OCR(image, workItems, workers)
+        else:
+            pools = {'easyocr': easyocr_reader_pool()}
+            results = self.threaded_OCR(image, workItems, workers, pools, stage="OCR cascade")
+            pools['easyocr'].report()
+
+        settled = {}
+        remaining = {}
         for index in zones:
-            result[index] = {}
-            (x, y, w, h) = zones[index]['box']
-            xOrigin = x - w/2
-            yOrigin = y - h/2
-            
-            # Extract region of interest
-            regionOfInterest = image[int(yOrigin) : int(y+h), int(xOrigin) : int(x+w)]
+            tier, entries = results[index]
+            if tier is None:
+                remaining[index] = zones[index]
+            else:
+                settled[index] = entries
+                self.ocrTierCounts[tier] += 1
+        self.ocrTierCounts['paddle'] += len(remaining)
+        return settled, remaining
 
+    def light_OCR(self, image, zones, result, easyocrPool, kind='equipment'):
+        """Lecture de chaque zone par les moteurs de la cascade: result[index] = (moteur qui l'a reglee ou None, textes)
+
+        Chaque lecture easyocr emprunte un lecteur a `easyocrPool` (un lecteur n'est jamais utilise par deux threads)."""
+        for index in zones:
+            result[index] = (None, {})
+            regionOfInterest = self.crop_zone(image, zones[index]['box'])
             if regionOfInterest.size == 0:
                 continue
 
-            # --- Preprocessing for better OCR accuracy ---
-            # 1. Convert to grayscale
-            gray = cv2.cvtColor(regionOfInterest, cv2.COLOR_BGR2GRAY)
+            for name, minConfidence in OCR_CASCADE_TIERS:
+                if name in self.unavailableOcrTiers:
+                    continue
+                try:
+                    if name == 'easyocr':
+                        with easyocrPool.reader() as reader_instance:
+                            entries, confidence = self.easyocr_OCR(regionOfInterest, reader_instance)
+                    else:
+                        entries, confidence = self.tesseract_OCR(regionOfInterest)
+                except Exception as e:
+                    # Engine not installed (or failing): the following tiers take over
+                    if name not in self.unavailableOcrTiers:
+                        self.unavailableOcrTiers.add(name)
+                        cprint(f"OCR cascade: {name} unavailable ({e})", 'yellow')
+                    continue
 
-            # 2. Upscale the image (3x helps with small text)
-            scale_factor = 3
-            upscaled = cv2.resize(gray, None, fx=scale_factor, fy=scale_factor, interpolation=cv2.INTER_CUBIC)
+                if self.is_settled(entries, confidence, minConfidence, kind):
+                    result[index] = (name, entries)
+                    break
+
+    def is_settled(self, entries, confidence, minConfidence, kind='equipment'):
+        """Le resultat d'un moteur est garde si il est sur et si chaque texte est reconnu par les regles
+
+        Les zones d'equipements portent le nom d'hote: la regle du hostname suffit a les regler. Elle accepte presque
+        toute chaine alphanumerique: sur les zones de texte des liens (adresses, protocoles, vlans), un texte qui ne
+        correspond qu'a elle ne regle pas la zone, PaddleOCR la relit."""
+        ignored = set() if kind == 'equipment' else {'hostname'}
+        return (bool(entries) and confidence >= minConfidence
+                and all(rule_classifier.matches(entry['text']) - ignored for entry in entries.values()))
+
+    def tesseract_OCR(self, regionOfInterest):
+        """Lecture d'une zone par tesseract, ligne par ligne: ({counter: {'text', 'coordinates'}}, confiance minimale)"""
+        pipeline = self.preprocessing['tesseract']
+        data = pytesseract.image_to_data(pipeline.run(regionOfInterest), config='--psm 6', output_type=pytesseract.Output.DICT)
+
+        lines = {}
+        for i, word in enumerate(data['text']):
+            confidence = float(data['conf'][i])
+            if not word.strip() or confidence < 0:
+                continue
+            line = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(line, []).append((word, confidence / 100, data['left'][i], data['top'][i], data['width'][i], data['height'][i]))
+
+        entries = {}
+        confidences = []
+        for counter, words in enumerate(lines.values()):
+            x1 = min(left for _, _, left, _, _, _ in words)
+            y1 = min(top for _, _, _, top, _, _ in words)
+            x2 = max(left + width for _, _, left, _, width, _ in words)
+            y2 = max(top + height for _, _, _, top, _, height in words)
+            entries[counter] = {'text': " ".join(word for word, *_ in words),
+                                'coordinates': pipeline.zone_coordinates([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])}
+            confidences.append(min(confidence for _, confidence, *_ in words))
+        return entries, min(confidences, default=0.0)
+
+    def easyocr_OCR(self, regionOfInterest, reader_instance):
+        """Lecture d'une zone par easyocr: ({counter: {'text', 'coordinates'}}, confiance minimale)"""
+        pipeline = self.preprocessing['easyocr']
+        ocrResult = reader_instance.readtext(pipeline.run(regionOfInterest), **EASYOCR_OPTIONS)
+
+        entries = {}
+        for counter, (bbox, text, probability) in enumerate(ocrResult):
+            entries[counter] = {'text': text, 'coordinates': pipeline.zone_coordinates(bbox)}
+        return entries, min((probability for _, _, probability in ocrResult), default=0.0)
+
+    def report_ocr_tiers(self):
+        total = sum(self.ocrTierCounts.values())
+        if not total:
+            return
+        shares = ", ".join(f"{name} {count} ({count / total:.0%})" for name, count in self.ocrTierCounts.items())
+        cprint(f"OCR cascade: {total} zones settled by {shares}", 'cyan')
+
+    def threaded_OCR(self, image, workItems, workers, pools, stage="OCR"):
+        """OCR des taches par `workers` threads, les lecteurs etant pretes par les pools"""
+        workQueue = queue.Queue()
+        for item in workItems:
+            workQueue.put(item)
+
+        results = {}
+        errors = []
+        # The readers get their share of the cores when they are created (see logic/ocr_readers.py):
+        # OpenCV (crops, line counting) gets the same share in each worker
+        with thread_budget.stage(stage, workers):
+            threads = [threading.Thread(target=self.ocr_worker, args=(image, workQueue, results, errors, pools)) for _ in range(workers)]
+            for thread in threads:
+                thread.start()
+
+            # Wait for all the threads to finish their work before continuing
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+        return results
+
+    def process_pool_OCR(self, image, workItems, workers):
+        """OCR des taches par un pool de `workers` processus, chacun avec ses propres lecteurs
+
+        L'image est copiee une fois en memoire partagee: seules les coordonnees des zones sont envoyees aux processus."""
+        from logic.ocr_processes import SharedImage, ocr_process_pool, ocr_task
+
+        executor = ocr_process_pool(workers, thread_budget.threads_per_worker(workers), self.ocr_worker_config())
+        results = {}
+        cprint(f"OCR: {workers} process(es) x {thread_budget.threads_per_worker(workers)} thread(s)", 'cyan')
+        with SharedImage(image) as sharedImage:
+            futures = [executor.submit(ocr_task, sharedImage.descriptor, mode, zones, kind) for mode, zones, kind in workItems]
+            # The shared memory is released only once no process reads it anymore
+            wait(futures)
+        # result() re-raises the error of a worker
+        for future in futures:
+            result, preprocessingStats = future.result()
+            results.update(result)
+            for engine, stats in preprocessingStats.items():
+                self.preprocessing[engine].merge_stats(stats)
+        return results
+
+    def ocr_worker_config(self):
+        """Reglages de l'OCR transmis aux processus d'OCR (l'instance TopologyData d'un processus est creee par defaut)"""
+        return {
+            'ocrMode': self.ocrMode,
+            'preprocessing': {engine: pipeline.steps for engine, pipeline in self.preprocessing.items()},
+            'cores': thread_budget.cores,
+        }
 
-            # 3. Add padding (white border) - critical for text touching edges
-            # Add 10px white border (assuming grayscale 255 is white)
-            padding = 10
-            padded = cv2.copyMakeBorder(upscaled, padding, padding, padding, padding, cv2.BORDER_CONSTANT, value=255)
+    def apply_ocr_worker_config(self, config):
+        """Applique, dans un processus d'OCR, les reglages de l'instance du processus principal"""
+        if not config:
+            return
+        self.ocrMode = config['ocrMode']
+        self.preprocessing = {engine: PreprocessingPipeline(steps, name=f"{engine} preprocessing")
+                              for engine, steps in config['preprocessing'].items()}
+        thread_budget.cores = config['cores']
+
+    def ocr_workers_count(self, items, poolSize):
+        """Nombre de threads d'OCR: borne par les coeurs disponibles, la taille du pool et le nombre de taches"""
+        workers = OCR_WORKERS or min(thread_budget.cores, poolSize)
+        return max(1, min(workers, items))
+
+    def ocr_worker(self, image, workQueue, results, errors, pools):
+        """Tire les taches de la file une a une jusqu'a ce qu'elle soit vide"""
+        while True:
+            try:
+                mode, zones, kind = workQueue.get_nowait()
+            except queue.Empty:
+                return
 
-            # 4. Optional: Denoising / Thresholding (can sometimes help, but easyocr handles some internally)
-            threshold = cv2.threshold(padded, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+            result = {}
+            try:
+                if mode == 'cascade':
+                    # tesseract runs as a process, the easyocr readers are lent by their pool
+                    self.light_OCR(image, zones, result, pools['easyocr'], kind)
+                else:
+                    with pools[mode].reader() as reader_instance:
+                        if mode == 'recognition':
+                            self.paddle_recognition(image, zones, result, reader_instance)
+                        else:
+                            self.paddleOCR(image, zones, result, reader_instance)
+            except Exception as e:
+                errors.append(e)
+                return
+            results.update(result)
+
+    def split_zones_by_lines(self, image, zones):
+        """Separe les zones ne contenant qu'une ligne de texte de celles qui en contiennent plusieurs
+
+        Les zones sans aucune ligne de texte (vides, ou rognees hors de l'image) sont mises a part: elles ne sont pas lues.
+        Renvoie (zones d'une ligne, zones de plusieurs lignes, zones sans texte)."""
+        singleLineZones = {}
+        multiLineZones = {}
+        emptyZones = {}
+        for index in zones:
+            regionOfInterest = self.crop_zone(image, zones[index]['box'], gray=True)
+            lines = self.count_text_lines(regionOfInterest) if regionOfInterest.size != 0 else 0
+            if lines == 0:
+                emptyZones[index] = zones[index]
+            elif lines == 1:
+                singleLineZones[index] = zones[index]
+            else:
+                multiLineZones[index] = zones[index]
+        return singleLineZones, multiLineZones, emptyZones
+
+    def count_text_lines(self, regionOfInterest, minHeight=3):
+        """Compte les lignes de texte d'une zone (couleur ou niveaux de gris) par projection horizontale de l'image binarisee"""
+        gray = cv2.cvtColor(regionOfInterest, cv2.COLOR_BGR2GRAY) if regionOfInterest.ndim == 3 else regionOfInterest
+        binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+
+        # Light text on a dark background: the text is the minority of the pixels
+        if np.count_nonzero(binary) > binary.size / 2:
+            binary = cv2.bitwise_not(binary)
+
+        # A row belongs to a line of text if it holds some ink
+        inkRows = np.count_nonzero(binary, axis=1) > max(1, binary.shape[1] // 100)
+
+        lines = 0
+        height = 0
+        for hasInk in inkRows:
+            if hasInk:
+                height += 1
+            else:
+                if height >= minHeight:
+                    lines += 1
+                height = 0
+        if height >= minHeight:
+            lines += 1
+        return lines
+
+    def paddle_recognition(self, image, zones, result, recognizer, batchSize=OCR_RECOGNITION_BATCH_SIZE):
+        """Reconnaissance seule, par lots, du texte des zones deja localisees par YOLO
+
+        Le modele ne localise pas le texte: ses coordonnees sont celles de toute la zone (relatives a la zone,
+        comme celles du pipeline complet, qui donne le contour du texte lui-meme)."""
+        crops = []
+        for index in zones:
+            result[index] = {}
+            regionOfInterest = self.crop_zone(image, zones[index]['box'])
+            if regionOfInterest.size == 0:
+                continue
+            crops.append((index, regionOfInterest.shape[:2], self.preprocessing['paddle'].run(regionOfInterest)))
 
-            # 5. Optional: Noise Reduction (can help with very noisy images)
-            denoised = cv2.fastNlMeansDenoising(threshold, None, h=10, templateWindowSize=7, searchWindowSize=21)
-            
-            # 6. Optional: Image Enhancement (can help with low contrast)
-            enhanced = cv2.equalizeHist(denoised)
+        for start in range(0, len(crops), batchSize):
+            batch = crops[start:start + batchSize]
+            ocrResult = recognizer.predict([crop for _, _, crop in batch], batch_size=batchSize)
+
+            for (index, (height, width), _), res in zip(batch, ocrResult):
+                text = res.get('rec_text')
+                if text and res.get('rec_score') >= OCR_MIN_SCORE:
+                    # Size of the zone itself, whatever the preprocessing did to the crop
+                    result[index][0] = {'text': text, 'coordinates': [[0, 0], [width, 0], [width, height], [0, height]]}
+
+    def easyOCR(self, image, zones, result, reader_instance):
+        for index in zones:
+            result[index] = {}
+            # Extract region of interest
+            regionOfInterest = self.crop_zone(image, zones[index]['box'])
+
+            if regionOfInterest.size == 0:
+                continue
+
+            # Preprocessing for better OCR accuracy (gray, upscale, padding, threshold, denoise, equalize, contrast)
+            pipeline = self.preprocessing['easyocr']
+            enhanced = pipeline.run(regionOfInterest)
 
-            # 7 Increase contrast
-            enhanced = cv2.convertScaleAbs(enhanced, alpha=2, beta=0)
-            
-            # Debug: save processed image (optional)
-            # cv2.imwrite(f"debug_ocr_{index}.png", padded)
-            
             # Read the text from the zone with 'easyocr'
-            ocrResult = reader_instance.readtext(
-                enhanced,
-                decoder='beamsearch',
-                contrast_ths=0.05,
-                adjust_contrast=0.7,
-                text_threshold=0.5, # Lowered from 0.6
-                low_text=0.3,       # Lowered from 0.4
-                mag_ratio=1.0,       # We already upscaled
-                link_threshold=0.5
-            )
-
-            # cprint("OCR result", 'green')
-            # print(ocrResult)
-            # cprint("----------------------\n", 'green')
+            ocrResult = reader_instance.readtext(enhanced, **EASYOCR_OPTIONS)
 
             counter = 0
             for (bbox, text, probability) in ocrResult:
                 if probability >= 0.5:   # Lowered threshold slightly to catch more potential matches
-                    result[index][counter] = {'text': text, 'coordinates': bbox}
+                    result[index][counter] = {'text': text, 'coordinates': pipeline.zone_coordinates(bbox)}
                     counter += 1
 
     def paddleOCR(self, image, zones, result, reader_instance):
@@ -992,45 +1399,16 @@ class TopologyData:
 
         for index in zones:
             result[index] = {}
-            (x, y, w, h) = zones[index]['box']
-            xOrigin = x - w/2
-            yOrigin = y - h/2
-            
             # Extract region of interest
-            regionOfInterest = image[int(yOrigin) : int(y+h), int(xOrigin) : int(x+w)]
+            regionOfInterest = self.crop_zone(image, zones[index]['box'])
 
             if regionOfInterest.size == 0:
                 continue
 
-            # --- Preprocessing for better OCR accuracy ---
-            # 1. Convert to grayscale
-            gray = cv2.cvtColor(regionOfInterest, cv2.COLOR_BGR2GRAY)
-
-            # 2. Upscale the image (3x helps with small text)
-            scale_factor = 3
-            upscaled = cv2.resize(gray, None, fx=scale_factor, fy=scale_factor, interpolation=cv2.INTER_CUBIC)
+            # PaddleOCR runs its own preprocessing: by default no step is applied here
+            regionOfInterest = self.preprocessing['paddle'].run(regionOfInterest)
 
-            # 3. Add padding (white border) - critical for text touching edges
-            # Add 10px white border (assuming grayscale 255 is white)
-            padding = 10
-            padded = cv2.copyMakeBorder(upscaled, padding, padding, padding, padding, cv2.BORDER_CONSTANT, value=255)
-
-            # 4. Optional: Denoising / Thresholding (can sometimes help, but easyocr handles some internally)
-            threshold = cv2.threshold(padded, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-
-            # 5. Optional: Noise Reduction (can help with very noisy images)
-            denoised = cv2.fastNlMeansDenoising(threshold, None, h=10, templateWindowSize=7, searchWindowSize=21)
-            
-            # 6. Optional: Image Enhancement (can help with low contrast)
-            enhanced = cv2.equalizeHist(denoised)
-
-            # 7 Increase contrast
-            enhanced = cv2.convertScaleAbs(enhanced, alpha=2, beta=0)
-            
-            # Debug: save processed image (optional)
-            # cv2.imwrite(f"debug_ocr_{index}.png", padded)
-            
-            # Read the text from the zone with 'easyocr'
+            # Read the text from the zone with 'PaddleOCR'
             ocrResult = reader_instance.predict(regionOfInterest)
 
             cprint("OCR result", 'green')
@@ -1050,39 +1428,70 @@ class TopologyData:
     def closest_to_the_link(self, link):
         """Determine la distance la plus faible entre le lien et la zone de texte
 
-        regionsPoints = [(x1, y1), (x2, y2)]  
         link = [(x1, y1), (x2, y2)]
 
-        En sortie il renvoie les coordonnees du point le plus proche du lien et la distance entre ce point et le lien.
+        En sortie il renvoie l'identifiant de la zone de texte la plus proche du lien et la distance entre la zone et le lien.
+        Pour un lien detecte, la ligne de la matrice des distances (link_text_distances) est lue; les autres segments
+        sont mesures par le noyau NumPy, les zones plates etant ignorees.
         """
+        segment = np.asarray(link, dtype=np.float64).reshape(1, 2, 2)
+        if getattr(self, "links", None):
+            rows = np.flatnonzero((self.link_index.segments == segment).all(axis=(1, 2)))
+            if rows.size:
+                return self.closest_text_zone(self.link_index.ids[int(rows[0])])
 
-        textZones = self.detected_linktext_zones
-        zoneDistancePair = []
-        for index in textZones:
-            # Convert width and height box to four points box
-            text_points = self.convert_width_height_to_points(textZones[index]['box'])
-
-            # Text zone rectangle
-            rectangle = Polygon(text_points)
+        zoneIds, rectangles = self.text_zone_rectangles()
+        distances = np.where(self.valid_rectangles(rectangles), segment_rectangle_distances(segment, rectangles)[0], np.inf)
 
-            # Link line
-            linkLine = LineString(link)
+        # No valid text zone
+        if not np.isfinite(distances).any():
+            return None, None
+        # Return the index of the (first) text zone with the minimum distance and the minimum distance
+        position = int(np.argmin(distances))
+        return zoneIds[position], float(distances[position])
+
+    def link_text_distances(self):
+        """Matrice (liens, zones de texte) des distances entre les liens et le contour des zones de texte des liens
+
+        Calculee une seule fois et gardee sur l'instance (les zones plates sont a l'infini): l'association du texte
+        aux liens et les re-associations suivantes ne font que la lire. Elle est recalculee si les liens ou les zones
+        sont remplaces, ou apres invalidate_link_text_distances().
+        Renvoie (identifiants des liens, identifiants des zones, matrice)."""
+        links, textZones = self.links, self.detected_linktext_zones
+        cached = self._linkTextDistances
+        if (cached is None or cached['links'] is not links or cached['zones'] is not textZones
+                or cached['shape'] != (len(links), len(textZones))):
+            zoneIds, rectangles = self.text_zone_rectangles()
+            distances = self.link_index.rectangle_distances(rectangles)
+            distances[:, ~self.valid_rectangles(rectangles)] = np.inf
+            self._linkTextDistances = {'links': links, 'zones': textZones, 'shape': distances.shape,
+                                       'linkIds': self.link_index.ids, 'zoneIds': zoneIds, 'distances': distances}
+
+        cached = self._linkTextDistances
+        return cached['linkIds'], cached['zoneIds'], cached['distances']
+
+    def invalidate_link_text_distances(self):
+        """A appeler apres la modification d'un lien ou d'une zone de texte (edition des donnees)"""
+        self._linkTextDistances = None
+
+    def closest_text_zone(self, linkId):
+        """(zone de texte la plus proche du lien, distance), lue dans la matrice des distances; (None, None) sans zone"""
+        _, zoneIds, distances = self.link_text_distances()
+        row = distances[self.link_index.positions[linkId]]
+        if not np.isfinite(row).any():
+            return None, None
+        # First of the equidistant zones, as min() in closest_to_the_link
+        position = int(np.argmin(row))
+        return zoneIds[position], float(row[position])
 
-            # Skip invalid rectangles
-            if not rectangle.is_valid or rectangle.is_empty:
-                continue
+    def text_zone_rectangles(self):
+        """Identifiants et rectangles (xmin, ymin, xmax, ymax) des zones de texte des liens"""
+        textZones = self.detected_linktext_zones
+        return list(textZones), box_rectangles([zone['box'] for zone in textZones.values()])
 
-            # Determine the closest points between the link and the rectangle boundary
-            pointOnLink, p_on_rectangle = nearest_points(linkLine, rectangle.boundary)
-            distance = pointOnLink.distance(p_on_rectangle)
-            zoneDistancePair.append((index, distance))
-        
-        # Guard against empty list to avoid ValueError from min()
-        if not zoneDistancePair:
-            return None, None
-        else:
-            # Return the index of the text zone with the minimum distance and the minimum distance
-            return min(zoneDistancePair, key=lambda x: x[1])
+    def valid_rectangles(self, rectangles):
+        """Rectangles d'aire non nulle (les autres ne forment pas un polygone valide)"""
+        return (rectangles[:, 2] > rectangles[:, 0]) & (rectangles[:, 3] > rectangles[:, 1])
         
     def link_text_to_links(self, text):
         """
@@ -1091,8 +1500,10 @@ class TopologyData:
         links = self.links
         textOnLinks = {}
         for link in links.keys():
-            closestTextZone, _ = self.closest_to_the_link(links[link]['points'])
+            # Row of the link in the links x text zones distance matrix (computed once)
+            closestTextZone, _ = self.closest_text_zone(link)
             joined = None
+            cls = None
             if closestTextZone is not None and closestTextZone in text:
                 zone_entries = text[closestTextZone]
                 # collect all OCR pieces in the zone and join them
@@ -1248,26 +1659,6 @@ class TopologyData:
                                 return f"{network_add_list[0]}.{network_add_list[1]}.{network_add_list[2]}.{incomplete_ip_list[-1]}/{str(prefix_len)}"
                             else: return None
 
-    def is_data_extracted(self, currentProjectPath):
-        privateDB = pathlib.Path(currentProjectPath)/"privateDB.db"
-        connection = sqlite3.connect(privateDB)
-        cursor = connection.cursor()
-        cursor.execute("SELECT * FROM extracted_data")
-        data = cursor.fetchall()
-        connection.close()
-        if data:
-            return True
-        else:
-            return False
-
-    def get_all_equipments(self, database):
-        connection = sqlite3.connect(database)
-        cursor = connection.cursor()
-        cursor.execute("SELECT equipment_id, equipment_name FROM equipment")
-        equipments = cursor.fetchall()
-        connection.close()
-        return equipments
-
     def format_data_for_yaml(self, zoneTextsLink):
         """Format data for YAML generation."""
 
@@ -1280,6 +1671,9 @@ class TopologyData:
         if not zoneTextsLink:
             cprint("No zoneTextsLink provided, skipping YAML generation", "yellow")
             return
+
+        # Compact graph of the extraction (self.graph); the host_vars are written from the zones as before
+        self.topology_graph(zoneTextsLink)
         
         all_group = {"nodes": {}}
 
@@ -1375,59 +1769,19 @@ class TopologyData:
                     
                     if ip_val:
                         if iface_name:
-                            host_data['interfaces'][iface_name]['ip'] = ip_val
+                            host_data['interfaces'].setdefault(iface_name, {})['ip'] = ip_val
                         else:
                             host_data['interfaces']['eth0'] = {
                                 'ip': ip_val
                             }
     
             all_group["nodes"][clean_hostname] = host_data
-            data = all_group
-        
-        return data
-
-    def save_data_to_yaml(self, data, currentProjectPath):
-        """Save the formatted data into YAML files for Ansible.
-        """
-
-        project_path = pathlib.Path(currentProjectPath)
-        print(project_path)
-        group_vars_dir = project_path / "group_vars"
-        host_vars_dir = project_path / "host_vars"
-        group_vars_dir.mkdir(parents=True, exist_ok=True)
-        host_vars_dir.mkdir(parents=True, exist_ok=True)
-
-        data = data['nodes']
-
-        for hostname, host_data in data.items():
-            # Write individual host file
-            host_vars_file = host_vars_dir / f"{hostname}.yml"
-            with open(host_vars_file, "w", encoding="utf-8") as host_file:
-                yaml.safe_dump(host_data, host_file, default_flow_style=False, sort_keys=False, allow_unicode=True)
-                cprint(f"file {hostname}.yml successfully saved", 'green')
-
-        # Write out group_vars/all.yml
-        all_vars_path = project_path / "group_vars" / "all.yml"
-        with open(all_vars_path, "w") as yaml_file:
-            yaml.dump(data, yaml_file, default_flow_style=False)
-
-        cprint("Data saved in the yaml files (host_vars + group_vars/all.yml)", 'green')
-
-    def load_data_from_yaml(self, currentProjectPath):
-        """Load data from group_vars/all.yml if it exists."""
-        project_path = pathlib.Path(currentProjectPath)
-        all_vars_path = project_path / "group_vars" / "all.yml"
         
-        if not all_vars_path.exists():
-            return None
-            
-        try:
-            with open(all_vars_path, "r", encoding="utf-8") as f:
-                nodes_data = yaml.safe_load(f)
-            
-            if nodes_data:
-                return {"nodes": nodes_data}
-            return None
-        except Exception as e:
-            cprint(f"Error loading YAML data: {e}", 'red')
-            return None
\ No newline at end of file
+        return all_group
+
+    def topology_graph(self, zoneTextsLink=None):
+        """Graphe compact de la topologie extraite (equipements, interfaces, liens), garde dans self.graph"""
+        self.graph = TopologyGraph.from_extraction(zoneTextsLink if zoneTextsLink is not None else self.zoneLinkText,
+                                                   getattr(self, "linkedEquipments", {}), getattr(self, "links_text_map", {}))
+        cprint(f"Topology graph: {len(self.graph)} nodes, {len(self.graph.edgeKeys)} links", 'cyan')
+        return self.graph
\ No newline at end of file
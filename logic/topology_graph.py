@@ -0,0 +1,332 @@
+import bisect
+import ipaddress
+from collections import deque
+
+import numpy as np
+
+
+# Longueur de prefixe supposee pour une adresse sans masque (celle du template router.j2: 255.255.255.0)
+DEFAULT_PREFIX_LENGTH = 24
+
+
+class StringTable:
+    """Chaines internees: chaque nom d'hote, type d'equipement, nom d'interface... n'est garde qu'une fois,
+    les tableaux du graphe ne contiennent que son numero (-1 pour None)"""
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def intern(self, text):
+        if text is None:
+            return -1
+        id = self.ids.get(text)
+        if id is None:
+            id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return id
+
+    def find(self, text):
+        return self.ids.get(text, -1)
+
+    def __getitem__(self, id):
+        return None if id < 0 else self.strings[id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+def csr(groups, count):
+    """Ordre (stable) des elements par groupe et decalages de chaque groupe: les elements du groupe g sont
+    order[offsets[g]:offsets[g + 1]]"""
+    groups = np.asarray(groups, dtype=np.int64)
+    order = np.argsort(groups, kind="stable")
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(groups, minlength=count), out=offsets[1:])
+    return order, offsets
+
+
+def parse_interface(address):
+    """Adresse 'a.b.c.d/n' (ou sans masque) -> ipaddress.IPv4Interface, None si ce n'est pas une adresse IPv4"""
+    if not address:
+        return None
+    text = str(address).strip()
+    if '/' not in text:
+        text = f"{text}/{DEFAULT_PREFIX_LENGTH}"
+    try:
+        return ipaddress.IPv4Interface(text)
+    except ValueError:
+        return None
+
+
+class TopologyGraph:
+    """Graphe compact de la topologie extraite
+
+    - noeuds: les equipements (cle: identifiant de zone ou nom d'hote), avec leur nom d'hote, leur type et
+      l'adresse de l'equipement quand elle n'est pas rattachee a une interface (pc, serveur)
+    - ports: les interfaces de chaque noeud (lien, nom, adresse, protocole, vlan), ranges par noeud (CSR)
+    - aretes: les liens entre deux noeuds, avec l'adjacence de chaque noeud rangee de la meme facon (CSR)
+    Les chaines sont internees, les tableaux sont des tableaux NumPy. Les voisins d'un noeud sont une tranche
+    de tableau, l'appartenance de deux noeuds a la meme composante est une comparaison, et les ports d'un
+    sous-reseau sont trouves par recherche dichotomique dans les adresses triees. Le plus court chemin reste
+    un parcours en largeur (limite a la composante des deux noeuds).
+    """
+    def __init__(self, nodes, ports, edges):
+        """
+        - nodes: [(cle, nom d'hote, type, adresse), ...]
+        - ports: [(cle du noeud, lien, nom de l'interface, adresse, protocole, vlan), ...] dans l'ordre des interfaces
+        - edges: [(cle du lien, cle du noeud A, cle du noeud B), ...]
+        """
+        self.strings = StringTable()
+        intern = self.strings.intern
+
+        # Nodes
+        self.nodeKeys = [node[0] for node in nodes]
+        self.nodeIndex = {key: node for node, key in enumerate(self.nodeKeys)}
+        self.nodeHostname = np.array([intern(node[1]) for node in nodes], dtype=np.int32)
+        self.nodeDevice = np.array([intern(node[2]) for node in nodes], dtype=np.int32)
+        self.nodeAddress = np.array([intern(node[3]) for node in nodes], dtype=np.int32)
+        self.hostnameIndex = {}
+        for node, hostname in enumerate(self.nodeHostname.tolist()):
+            if hostname >= 0:
+                self.hostnameIndex.setdefault(hostname, node)
+        nodeCount = len(self.nodeKeys)
+
+        # Ports, grouped by node in their original order
+        ports = [port for port in ports if port[0] in self.nodeIndex]
+        order, self.portOffsets = csr([self.nodeIndex[port[0]] for port in ports], nodeCount)
+        ports = [ports[i] for i in order.tolist()]
+        self.portNode = np.array([self.nodeIndex[port[0]] for port in ports], dtype=np.int32)
+        self.portLinks = [port[1] for port in ports]
+        self.portName = np.array([intern(port[2]) for port in ports], dtype=np.int32)
+        self.portAddress = np.array([intern(port[3]) for port in ports], dtype=np.int32)
+        self.portProtocol = np.array([intern(port[4]) for port in ports], dtype=np.int32)
+        self.portVlan = np.array([intern(port[5]) for port in ports], dtype=np.int32)
+
+        # Edges and adjacency: each edge is seen from both of its nodes
+        edges = [edge for edge in edges if edge[1] in self.nodeIndex and edge[2] in self.nodeIndex]
+        self.edgeKeys = [key for key, _, _ in edges]
+        self.edgeNodes = np.array([(self.nodeIndex[a], self.nodeIndex[b]) for _, a, b in edges], dtype=np.int32).reshape(-1, 2)
+        sources = np.concatenate((self.edgeNodes[:, 0], self.edgeNodes[:, 1]))
+        targets = np.concatenate((self.edgeNodes[:, 1], self.edgeNodes[:, 0]))
+        edgeIds = np.concatenate((np.arange(len(edges)), np.arange(len(edges))))
+        order, self.adjacencyOffsets = csr(sources, nodeCount)
+        self.adjacency = targets[order].astype(np.int32)
+        self.adjacencyEdge = edgeIds[order].astype(np.int32)
+
+        self.component = self.connected_components()
+
+        # Addresses of the ports (and of the nodes themselves) sorted by value, for the subnet queries
+        addresses = [(int(interface.ip), int(self.portNode[port]), port)
+                     for port, interface in enumerate(map(parse_interface, self.addresses())) if interface]
+        addresses += [(int(interface.ip), node, -1)
+                      for node, interface in enumerate(map(parse_interface, self.node_addresses())) if interface]
+        addresses.sort()
+        self.addressValues = [value for value, _, _ in addresses]
+        self.addressNodes = np.array([node for _, node, _ in addresses], dtype=np.int32)
+        self.addressPorts = np.array([port for _, _, port in addresses], dtype=np.int32)
+
+    @classmethod
+    def from_extraction(cls, zoneLinkText, linkedEquipments, linksMap=None):
+        """Graphe de l'extraction: zones d'equipements, textes rattaches aux liens (process_text), liens entre zones
+
+        Pour chaque interface, l'adresse, le protocole et le vlan sont resolus comme dans format_data_for_yaml:
+        d'abord les valeurs de la zone, puis le texte classe du lien (links_text_map)."""
+        linksMap = linksMap or {}
+        nodes = []
+        ports = []
+        for zoneId, info in zoneLinkText.items():
+            addresses = info.get('ip_addresses') or {}
+            # Single address of a pc or a server, else the first address found
+            address = info.get('ip_address') if isinstance(info.get('ip_address'), str) else None
+            if not address and addresses:
+                address = list(addresses.values())[0]
+            nodes.append((zoneId, info.get('hostname'), info.get('device'), address))
+
+            legacyAddresses = info.get('ip_add') or {}
+            protocols = info.get('protocols') or {}
+            vlans = info.get('vlans') or {}
+            zoneVlans = info.get('vlan') if isinstance(info.get('vlan'), dict) else {}
+            for linkId, interfaceName in (info.get('interfaces') or {}).items():
+                linkMeta = linksMap.get(linkId, {})
+                linkText = linkMeta.get('text')
+
+                address = addresses[linkId] if linkId in addresses else legacyAddresses.get(linkId)
+                protocol = protocols.get(linkId)
+                if protocol is None and linkMeta.get('class') == 'protocol':
+                    protocol = linkText
+                vlan = vlans.get(linkId)
+                if vlan is None and linkMeta.get('class') == 'vlan':
+                    vlan = linkText
+                if vlan is None:
+                    vlan = zoneVlans.get(linkId)
+                ports.append((zoneId, linkId, interfaceName, address, protocol, vlan))
+
+        edges = [(linkId, zoneA, zoneB) for linkId, (zoneA, zoneB) in (linkedEquipments or {}).items()]
+        return cls(nodes, ports, edges)
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        """Graphe des donnees au format YAML ({hostname: host_data}, eventuellement modifiees dans l'interface)
+
+        Les liens n'y figurent pas et aucune arete n'est creee: l'appartenance des interfaces aux sous-reseaux est gardee
+        dans l'index trie des adresses, les equipements d'un sous-reseau sont donnes par subnet_nodes et subnet_peers
+        (O(log n + k) par requete, au lieu d'une arete par paire d'equipements du sous-reseau)."""
+        graphNodes = []
+        ports = []
+        for hostname, hostData in (nodes or {}).items():
+            graphNodes.append((hostname, hostData.get('hostname', hostname), hostData.get('device_type'), None))
+            interfaces = hostData.get('interfaces') or {}
+            if isinstance(interfaces, list):
+                interfaces = {interface.get('name'): interface for interface in interfaces if isinstance(interface, dict)}
+            for name, interface in interfaces.items():
+                interface = interface if isinstance(interface, dict) else {}
+                ports.append((hostname, None, name, interface.get('ip'), interface.get('protocol'), interface.get('vlan')))
+        return cls(graphNodes, ports, [])
+
+    def connected_components(self):
+        """Numero de composante connexe de chaque noeud (parcours en largeur sur l'adjacence CSR)"""
+        component = np.full(len(self.nodeKeys), -1, dtype=np.int32)
+        label = 0
+        for start in range(len(self.nodeKeys)):
+            if component[start] >= 0:
+                continue
+            component[start] = label
+            queue = deque([start])
+            while queue:
+                node = queue.popleft()
+                for neighbor in self.adjacency[self.adjacencyOffsets[node]:self.adjacencyOffsets[node + 1]].tolist():
+                    if component[neighbor] < 0:
+                        component[neighbor] = label
+                        queue.append(neighbor)
+            label += 1
+        return component
+
+    # Nodes
+
+    def __len__(self):
+        return len(self.nodeKeys)
+
+    def node(self, key):
+        """Noeud d'une cle (identifiant de zone ou nom d'hote), None si il n'existe pas"""
+        return self.nodeIndex.get(key)
+
+    def node_by_hostname(self, hostname):
+        return self.hostnameIndex.get(self.strings.find(hostname))
+
+    def key(self, node):
+        return self.nodeKeys[node]
+
+    def hostname(self, node):
+        return self.strings[self.nodeHostname[node]]
+
+    def device(self, node):
+        return self.strings[self.nodeDevice[node]]
+
+    def address(self, node):
+        return self.strings[self.nodeAddress[node]]
+
+    def node_addresses(self):
+        return [self.strings[address] for address in self.nodeAddress.tolist()]
+
+    # Ports
+
+    def ports(self, node):
+        """Ports (interfaces) du noeud, dans leur ordre d'origine"""
+        return range(self.portOffsets[node], self.portOffsets[node + 1])
+
+    def port_node(self, port):
+        return int(self.portNode[port])
+
+    def port_name(self, port):
+        return self.strings[self.portName[port]]
+
+    def port_address(self, port):
+        return self.strings[self.portAddress[port]]
+
+    def find_port(self, node, name):
+        """Port du noeud portant le nom d'interface, None si il n'existe pas"""
+        nameId = self.strings.find(name)
+        for port in self.ports(node):
+            if self.portName[port] == nameId and nameId >= 0:
+                return port
+        return None
+
+    def port(self, port):
+        strings = self.strings
+        return {
+            'node': int(self.portNode[port]),
+            'link': self.portLinks[port],
+            'name': strings[self.portName[port]],
+            'address': strings[self.portAddress[port]],
+            'protocol': strings[self.portProtocol[port]],
+            'vlan': strings[self.portVlan[port]],
+        }
+
+    def addresses(self):
+        return [self.strings[address] for address in self.portAddress.tolist()]
+
+    # Adjacency
+
+    def neighbors(self, node):
+        """Noeuds voisins (un par lien)"""
+        return self.adjacency[self.adjacencyOffsets[node]:self.adjacencyOffsets[node + 1]].tolist()
+
+    def links(self, node):
+        """(cle du lien, voisin) de chaque lien du noeud"""
+        start, end = self.adjacencyOffsets[node], self.adjacencyOffsets[node + 1]
+        return [(self.edgeKeys[edge], neighbor) for edge, neighbor in zip(self.adjacencyEdge[start:end].tolist(), self.adjacency[start:end].tolist())]
+
+    def are_connected(self, nodeA, nodeB):
+        return self.component[nodeA] == self.component[nodeB]
+
+    def path(self, nodeA, nodeB):
+        """Plus court chemin (en nombre de liens) entre deux noeuds: [nodeA, ..., nodeB], None si ils ne sont pas relies
+
+        Parcours en largeur sur l'adjacence CSR, en O(V + E) pour la composante des deux noeuds: seul le cas
+        des noeuds non relies est resolu en temps constant (numeros de composante)."""
+        if not self.are_connected(nodeA, nodeB):
+            return None
+        previous = {nodeA: None}
+        queue = deque([nodeA])
+        while queue:
+            node = queue.popleft()
+            if node == nodeB:
+                break
+            for neighbor in self.neighbors(node):
+                if neighbor not in previous:
+                    previous[neighbor] = node
+                    queue.append(neighbor)
+
+        path = [nodeB]
+        while previous[path[-1]] is not None:
+            path.append(previous[path[-1]])
+        return path[::-1]
+
+    # Subnets
+
+    def subnet_range(self, network):
+        """Tranche des adresses triees appartenant au sous-reseau (recherche dichotomique)"""
+        network = ipaddress.IPv4Network(network, strict=False)
+        start = bisect.bisect_left(self.addressValues, int(network.network_address))
+        end = bisect.bisect_right(self.addressValues, int(network.broadcast_address))
+        return slice(start, end)
+
+    def subnet_ports(self, network):
+        """Ports dont l'adresse appartient au sous-reseau"""
+        ports = self.addressPorts[self.subnet_range(network)]
+        return ports[ports >= 0].tolist()
+
+    def subnet_nodes(self, network):
+        """Noeuds ayant une adresse (d'interface ou d'equipement) dans le sous-reseau"""
+        return list(dict.fromkeys(self.addressNodes[self.subnet_range(network)].tolist()))
+
+    def port_network(self, port):
+        interface = parse_interface(self.strings[self.portAddress[port]])
+        return interface.network if interface else None
+
+    def subnet_peers(self, port):
+        """Autres ports du meme sous-reseau que le port"""
+        network = self.port_network(port)
+        if network is None:
+            return []
+        return [peer for peer in self.subnet_ports(network) if peer != port]
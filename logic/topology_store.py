@@ -0,0 +1,77 @@
+import pathlib
+import sqlite3
+import yaml
+
+from termcolor import cprint
+
+
+class TopologyStore:
+    """Lecture et ecriture des donnees de topologie d'un projet (YAML et base privee)
+
+    Aucune dependance vers les modeles d'IA: utilisable pour ouvrir ou sauvegarder un projet."""
+
+    def is_data_extracted(self, currentProjectPath):
+        privateDB = pathlib.Path(currentProjectPath)/"privateDB.db"
+        connection = sqlite3.connect(privateDB)
+        cursor = connection.cursor()
+        cursor.execute("SELECT * FROM extracted_data")
+        data = cursor.fetchall()
+        connection.close()
+        if data:
+            return True
+        else:
+            return False
+
+    def get_all_equipments(self, database):
+        connection = sqlite3.connect(database)
+        cursor = connection.cursor()
+        cursor.execute("SELECT equipment_id, equipment_name FROM equipment")
+        equipments = cursor.fetchall()
+        connection.close()
+        return equipments
+
+    def save_data_to_yaml(self, data, currentProjectPath):
+        """Save the formatted data into YAML files for Ansible.
+        """
+
+        project_path = pathlib.Path(currentProjectPath)
+        print(project_path)
+        group_vars_dir = project_path / "group_vars"
+        host_vars_dir = project_path / "host_vars"
+        group_vars_dir.mkdir(parents=True, exist_ok=True)
+        host_vars_dir.mkdir(parents=True, exist_ok=True)
+
+        data = data['nodes']
+
+        for hostname, host_data in data.items():
+            # Write individual host file
+            host_vars_file = host_vars_dir / f"{hostname}.yml"
+            with open(host_vars_file, "w", encoding="utf-8") as host_file:
+                yaml.safe_dump(host_data, host_file, default_flow_style=False, sort_keys=False, allow_unicode=True)
+                cprint(f"file {hostname}.yml successfully saved", 'green')
+
+        # Write out group_vars/all.yml
+        all_vars_path = project_path / "group_vars" / "all.yml"
+        with open(all_vars_path, "w") as yaml_file:
+            yaml.dump(data, yaml_file, default_flow_style=False)
+
+        cprint("Data saved in the yaml files (host_vars + group_vars/all.yml)", 'green')
+
+    def load_data_from_yaml(self, currentProjectPath):
+        """Load data from group_vars/all.yml if it exists."""
+        project_path = pathlib.Path(currentProjectPath)
+        all_vars_path = project_path / "group_vars" / "all.yml"
+        
+        if not all_vars_path.exists():
+            return None
+            
+        try:
+            with open(all_vars_path, "r", encoding="utf-8") as f:
+                nodes_data = yaml.safe_load(f)
+            
+            if nodes_data:
+                return {"nodes": nodes_data}
+            return None
+        except Exception as e:
+            cprint(f"Error loading YAML data: {e}", 'red')
+            return None
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+import numpy as np
+from termcolor import cprint
+
+from logic.ocr_readers import paddle_reader_pool, recognizer_pool
+from logic.topology_data import EQUIPMENT_MODEL, LINKS_MODEL, ZONES_MODEL, TopologyData
+
+
+# Prechargement des modeles au demarrage de l'application (TOPOLOGY_MODEL_WARMUP=0 pour le desactiver,
+# par exemple sur les machines avec peu de memoire)
+MODEL_WARMUP = os.environ.get("TOPOLOGY_MODEL_WARMUP", "1") != "0"
+
+
+class ModelWarmup:
+    """Prechargement des modeles en arriere-plan
+
+    Les imports (torch, paddle, transformers) et le chargement des modeles se font dans un thread lance
+    apres l'affichage de la fenetre principale. Les modeles sont gardes par le registre et les pools de lecteurs:
+    le `Worker` d'extraction attend la fin du prechargement puis les retrouve deja en memoire.
+    """
+    def __init__(self, enabled=MODEL_WARMUP):
+        self.enabled = enabled
+        self.ready = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.errors = {}
+
+    def start(self):
+        """Lance le prechargement (une seule fois); sans effet si il est desactive"""
+        with self.lock:
+            if not self.enabled or self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self.run, name="model-warmup", daemon=True)
+            self.thread.start()
+
+    def steps(self):
+        data = TopologyData()
+        steps = [(model, lambda model=model: self.warm_yolo(data, model)) for model in (ZONES_MODEL, LINKS_MODEL, EQUIPMENT_MODEL)]
+        if data.textClassifier == 'cascade':
+            steps.append(("bert-finetuned", data.load_bert_classifier))
+        if data.ocrMode in ('recognition', 'cascade'):
+            steps.append(("PaddleOCR recognition", lambda: self.warm_pool(recognizer_pool())))
+        steps.append(("PaddleOCR", lambda: self.warm_pool(paddle_reader_pool())))
+        return steps
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            for name, step in self.steps():
+                try:
+                    step()
+                except Exception as e:
+                    # The extraction will load (and report) it again
+                    self.errors[name] = e
+                    cprint(f"Warm-up of {name} failed: {e}", "yellow")
+        finally:
+            self.ready.set()
+        cprint(f"Models warm-up done in {time.perf_counter() - start:.1f}s", "green")
+
+    def warm_yolo(self, data, model):
+        """Charge le modele et construit son predicteur avec une image vide"""
+        data.load_model(model).predict(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+
+    def warm_pool(self, pool):
+        with pool.reader():
+            pass
+
+    def is_ready(self):
+        return not self.enabled or self.thread is None or self.ready.is_set()
+
+    def wait(self, timeout=None):
+        """Attend la fin du prechargement si il a ete lance; renvoie True si il est termine"""
+        if self.is_ready():
+            return True
+        return self.ready.wait(timeout)
+
+
+# Prechargement partage par toute l'application
+model_warmup = ModelWarmup()
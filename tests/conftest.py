@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# The tests import the project modules (logic, benchmarks) from the root of the project
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
@@ -0,0 +1,87 @@
+import numpy as np
+import shapely
+from shapely.geometry import LineString, Point, box
+
+from logic.geometry import box_rectangles, points_rectangle, segment_rectangle_distances
+from logic.link_index import LinkIndex, ZoneIndex, boundary_distance
+
+
+def random_links(generator, count):
+    return {id: {'points': generator.uniform(0, 1000, (2, 2)).tolist()} for id in range(1, count + 1)}
+
+
+def test_box_rectangles_from_centered_boxes():
+    assert box_rectangles([[50, 40, 20, 10]]).tolist() == [[40, 35, 60, 45]]
+
+
+def test_points_rectangle():
+    assert points_rectangle([[0, 0], [10, 0], [10, 5], [0, 5]]).tolist() == [0, 0, 10, 5]
+    # Inclined quadrilateral: not a rectangle with horizontal and vertical sides
+    assert points_rectangle([[0, 5], [5, 0], [10, 5], [5, 10]]) is None
+
+
+def test_segment_rectangle_distances_match_shapely():
+    generator = np.random.default_rng(0)
+    segments = generator.uniform(0, 100, (300, 2, 2))
+    # Degenerate segment (a point) and segments along the sides
+    segments[0] = [[20, 20], [20, 20]]
+    segments[1] = [[10, 10], [30, 10]]
+    x, y = generator.uniform(0, 100, (2, 40))
+    w, h = generator.uniform(1, 30, (2, 40))
+    rectangles = np.stack((x, y, x + w, y + h), axis=1)
+    rectangles[0] = [10, 10, 30, 30]
+
+    distances = segment_rectangle_distances(segments, rectangles)
+    assert distances.shape == (300, 40)
+    for s, segment in enumerate(segments):
+        line = LineString(segment) if np.any(segment[0] != segment[1]) else Point(segment[0])
+        for r, rectangle in enumerate(rectangles):
+            assert np.isclose(distances[s, r], boundary_distance(box(*rectangle).boundary, line), atol=1e-9)
+
+
+def test_segment_rectangle_distances_empty():
+    assert segment_rectangle_distances(np.empty((0, 2, 2)), [[0, 0, 1, 1]]).shape == (0, 1)
+
+
+def test_link_index_nearest_matches_brute_force():
+    generator = np.random.default_rng(1)
+    links = random_links(generator, 200)
+    index = LinkIndex(links)
+    for rectangle in box_rectangles(generator.uniform(0, 1000, (50, 4)) * [1, 1, 0.1, 0.1]):
+        boundary = box(*rectangle).boundary
+        distances = {id: boundary_distance(boundary, LineString(link['points'])) for id, link in links.items()}
+        expected = min(distances, key=distances.get)
+
+        assert index.nearest(boundary, list(links)) == (expected, distances[expected])
+        nearestId, nearestDistance = index.nearest_rectangle(rectangle, list(links))
+        assert nearestId == expected and np.isclose(nearestDistance, distances[expected])
+
+        subset = list(links)[::3]
+        within = [id for id in subset if distances[id] < 100]
+        assert [id for id, _ in index.within(boundary, subset, 100)] == within
+        assert [id for id, _ in index.within_rectangle(rectangle, subset, 100)] == within
+
+
+def test_link_index_nearest_endpoint():
+    links = {'a': {'points': [[0, 0], [10, 0]]}, 'b': {'points': [[20, 0], [30, 0]]}, 'c': {'points': [[12, 0], [40, 0]]}}
+    index = LinkIndex(links)
+    assert index.nearest_endpoint((11, 0), ['a', 'b', 'c']) == ('a', 1.0)
+    assert index.nearest_endpoint((11, 0), ['b', 'c']) == ('c', 1.0)
+    assert index.nearest_endpoint((11, 0), []) == (None, float('inf'))
+    assert index.endpoint_distances((25, 0)).tolist() == [15.0, 5.0, 13.0]
+
+
+def test_link_index_is_stale():
+    links = {1: {'points': [[0, 0], [1, 1]]}}
+    index = LinkIndex(links)
+    assert not index.is_stale(links)
+    assert index.is_stale(dict(links))
+
+
+def test_zone_index_nearest():
+    zones = {1: {'box': [10, 10, 10, 10]}, 2: {'box': [100, 10, 10, 10]}, 3: {'box': [12, 10, 10, 10]}}
+    index = ZoneIndex(zones)
+    # Inside the overlap of zones 1 and 3: the first zone is kept
+    assert index.nearest([[11, 10], [100, 30], [60, 10]], maxDistance=20) == [1, 2, None]
+    assert ZoneIndex({}).nearest([[0, 0]], 10) == [None]
+    assert shapely.get_num_geometries(index.polygons[0]) == 1
@@ -0,0 +1,51 @@
+import os
+
+from logic.inference_cache import InferenceCache
+
+
+def test_key_depends_on_every_part(tmp_path):
+    cache = InferenceCache(tmp_path)
+    key = cache.key('zones', 'image', 'model', {'conf': 0.5, 'tiling': None})
+    # The order of the parameters does not change the key
+    assert key == cache.key('zones', 'image', 'model', {'tiling': None, 'conf': 0.5})
+    assert key != cache.key('links', 'image', 'model', {'conf': 0.5, 'tiling': None})
+    assert key != cache.key('zones', 'other image', 'model', {'conf': 0.5, 'tiling': None})
+    assert key != cache.key('zones', 'image', 'other model', {'conf': 0.5, 'tiling': None})
+    assert key != cache.key('zones', 'image', 'model', {'conf': 0.5, 'tiling': {'tile_size': 1280}})
+
+
+def test_put_then_get(tmp_path):
+    cache = InferenceCache(tmp_path)
+    key = cache.key('zones', 'image', 'model')
+    assert cache.get(key) is None
+    cache.put(key, {1: {'box': [1, 2, 3, 4]}})
+    assert cache.get(key) == {1: {'box': [1, 2, 3, 4]}}
+    assert (cache.hits, cache.misses) == (1, 1)
+    # No temporary file is left behind
+    assert [path.suffix for path in tmp_path.glob("*/*")] == [".pkl"]
+
+
+def test_corrupted_entry_is_dropped(tmp_path):
+    cache = InferenceCache(tmp_path)
+    key = cache.key('zones', 'image', 'model')
+    cache.put(key, [1, 2, 3])
+    cache.path(key).write_bytes(b"not a pickle")
+    assert cache.get(key) is None
+    assert not cache.path(key).exists()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = InferenceCache(tmp_path, maxSize=3500)
+    keys = [cache.key('ocr', str(i), 'model') for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, b"x" * 1000)
+        # Distinct modification times, the oldest first
+        os.utime(cache.path(key), (age, age))
+
+    cache.get(keys[0])
+    cache.put(cache.key('ocr', '3', 'model'), b"x" * 1000)
+    assert cache.path(keys[0]).exists()
+    assert not cache.path(keys[1]).exists()
+
+    cache.clear()
+    assert not list(tmp_path.glob("*/*.pkl"))
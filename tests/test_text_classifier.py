@@ -0,0 +1,63 @@
+from benchmarks.rule_classifier_benchmark import LegacyRules, check_labels, load_texts, random_texts
+from logic.text_classifier import CascadeClassifier, RuleClassifier
+
+
+class FakeNeural:
+    """Modele remplace par des predictions fixes"""
+    def __init__(self, predictions):
+        self.predictions = predictions
+        self.texts = []
+
+    def classify(self, texts):
+        self.texts.extend(texts)
+        return [self.predictions.get(text) for text in texts]
+
+
+def test_rules_match_the_legacy_predicates():
+    classifier = RuleClassifier()
+    legacy = LegacyRules()
+    check_labels(legacy, classifier, load_texts())
+    check_labels(legacy, classifier, random_texts(5000))
+
+
+def test_interface_names_are_normalised():
+    classifier = RuleClassifier()
+    assert classifier.normalise_interfaces_names('gi0/1') == 'GigabitEthernet0/1'
+    assert classifier.normalise_interfaces_names('Fa0/O') == 'FastEthernet0/0'
+    assert classifier.normalise_interfaces_names('R1') == 'R1'
+
+
+def test_list_and_single_text_orders():
+    classifier = RuleClassifier()
+    assert classifier.classify(['e0', 'OSPF', '10', '!!', 'e0']) == ['interface', 'hostname', 'incomplete_ip', 'other', 'interface']
+    assert classifier.classify_one('10.0.0.1') == 'hostname'
+    assert classifier.matches('10.0.0.1') == {'hostname', 'ip'}
+
+
+def test_cascade_resolves_unambiguous_texts_with_the_rules():
+    neural = FakeNeural({})
+    cascade = CascadeClassifier(lambda: neural)
+    assert cascade.classify(['OSPF', 'vlan10', '10', 'R1', '10.0.0.1']) == ['protocol', 'vlan', 'incomplete_ip', 'hostname', 'ip']
+    # The model is neither loaded nor called
+    assert cascade.neural is None and cascade.stats == {'rules': 5, 'neural': 0, 'fallback': 0}
+
+
+def test_cascade_sends_ambiguous_texts_to_the_model():
+    neural = FakeNeural({'RIPng v2': {'label': 'protocol', 'score': 0.95},
+                         'ab cd': {'label': 'hostname', 'score': 0.99},
+                         'x y': {'label': 'protocol', 'score': 0.5}})
+    cascade = CascadeClassifier(lambda: neural)
+    # Only the 'other' texts reach the model; a hostname is not allowed for them, a low score is ignored
+    assert cascade.classify(['RIPng v2', 'ab cd', 'x y', 'R1']) == ['protocol', 'other', 'other', 'hostname']
+    assert neural.texts == ['RIPng v2', 'ab cd', 'x y']
+    assert cascade.stats == {'rules': 1, 'neural': 1, 'fallback': 2}
+
+
+def test_cascade_without_model_keeps_the_rules():
+    def unavailable():
+        raise ImportError("No module named 'torch'")
+
+    cascade = CascadeClassifier(unavailable)
+    assert cascade.classify(['RIPng v2', 'Gi0/1']) == ['other', 'interface']
+    assert not cascade.neuralAvailable
+    assert CascadeClassifier().classify(['!!']) == ['other']
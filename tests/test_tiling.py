@@ -0,0 +1,90 @@
+import itertools
+import random
+
+from logic.tiling import (assign_ids, iou, merge_seams, non_max_suppression, tile_grid, tiling_parameters,
+                          truncated_edges)
+
+
+def zone(xyxy, conf=0.9, cls=0, tile=None, width=3000, height=3000):
+    cuts = truncated_edges(xyxy, tile, width, height) if tile else []
+    x1, y1, x2, y2 = xyxy
+    return {'cls': cls, 'conf': conf, 'xyxy': xyxy, 'xywh': ((x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1),
+            'truncated': bool(cuts), 'cuts': cuts}
+
+
+def test_tile_grid_covers_the_image():
+    width, height = 3000, 2000
+    tiles = tile_grid(width, height, tileSize=1280, overlap=0.2)
+    assert all(x2 - x1 <= 1280 and y2 - y1 <= 1280 for x1, y1, x2, y2 in tiles)
+    # The last tile of each row and column is aligned on the border of the image
+    assert max(x2 for _, _, x2, _ in tiles) == width
+    assert max(y2 for _, _, _, y2 in tiles) == height
+    for x, y in itertools.product(range(0, width, 97), range(0, height, 97)):
+        assert any(x1 <= x < x2 and y1 <= y < y2 for x1, y1, x2, y2 in tiles)
+
+
+def test_small_image_is_a_single_tile():
+    assert tile_grid(800, 600, tileSize=1280) == [(0, 0, 800, 600)]
+
+
+def test_truncated_edges_ignore_the_borders_of_the_image():
+    tile = (0, 0, 1280, 1280)
+    assert truncated_edges((0, 0, 100, 100), tile, 3000, 3000) == []
+    assert truncated_edges((1200, 10, 1279, 100), tile, 3000, 3000) == [('right', 1280)]
+    # The tile ends on the border of the image: the detection is complete
+    assert truncated_edges((1200, 10, 1279, 100), tile, 1280, 3000) == []
+
+
+def test_non_max_suppression_matches_the_pairwise_version():
+    generator = random.Random(0)
+    detections = []
+    for _ in range(200):
+        x, y = generator.uniform(0, 500), generator.uniform(0, 500)
+        w, h = generator.uniform(10, 80), generator.uniform(10, 80)
+        detections.append({'cls': generator.randint(0, 2), 'conf': generator.random(), 'xyxy': (x, y, x + w, y + h)})
+
+    expected = []
+    for detection in sorted(detections, key=lambda d: -d['conf']):
+        if all(kept['cls'] != detection['cls'] or iou(kept['xyxy'], detection['xyxy']) < 0.5 for kept in expected):
+            expected.append(detection)
+
+    kept = non_max_suppression(detections, 0.5)
+    assert sorted(map(id, kept)) == sorted(map(id, expected))
+
+
+def test_non_max_suppression_keeps_other_classes():
+    detections = [zone((0, 0, 100, 100), 0.9, cls=0), zone((1, 1, 100, 100), 0.8, cls=0), zone((1, 1, 100, 100), 0.7, cls=1)]
+    assert [d['conf'] for d in non_max_suppression(detections)] == [0.9, 0.7]
+
+
+def test_merge_seams_joins_a_zone_cut_by_a_tile():
+    left = zone((1200, 100, 1279, 200), tile=(0, 0, 1280, 1280))
+    right = zone((1200, 100, 1350, 200), conf=0.8, tile=(1024, 0, 2304, 1280))
+    assert left['truncated'] and not right['truncated']
+
+    merged = merge_seams([left, right])
+    assert len(merged) == 1
+    assert merged[0]['xyxy'] == (1200, 100, 1350, 200)
+    assert merged[0]['conf'] == 0.9
+
+
+def test_merge_seams_keeps_adjacent_zones_apart():
+    # Two zones touching the same tile edge, one on each side of it, without overlapping across it
+    left = zone((1200, 100, 1279, 200), tile=(0, 0, 1280, 1280))
+    right = zone((1282, 100, 1400, 200), tile=(1024, 0, 2304, 1280))
+    # Same extent across the edge but on another row: not the same zone
+    below = zone((1200, 300, 1350, 400), tile=(1024, 0, 2304, 1280))
+    assert len(merge_seams([left, right, below])) == 3
+
+
+def test_assign_ids_by_confidence_then_position():
+    detections = [zone((50, 0, 60, 10), 0.5), zone((0, 0, 10, 10), 0.5), zone((0, 50, 10, 60), 0.9)]
+    ordered = assign_ids(detections)
+    assert [d['xyxy'] for d in ordered] == [(0, 50, 10, 60), (0, 0, 10, 10), (50, 0, 60, 10)]
+    assert [d['id'] for d in ordered] == [1, 2, 3]
+
+
+def test_tiling_parameters_are_serialisable():
+    parameters = tiling_parameters()
+    assert parameters['tile_size'] > 0 and 0 <= parameters['overlap'] < 1
+    assert all(isinstance(value, (int, float)) for value in parameters.values())
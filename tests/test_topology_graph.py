@@ -0,0 +1,78 @@
+from logic.topology_graph import StringTable, TopologyGraph, parse_interface
+
+
+def extraction():
+    """R1 - SW1 - PC1 relies, R2 seul, R1 et R2 dans 10.0.0.0/24"""
+    zoneLinkText = {
+        1: {'hostname': 'R1', 'device': 'router', 'interfaces': {10: 'GigabitEthernet0/0', 11: 'GigabitEthernet0/1'},
+            'ip_addresses': {10: '10.0.0.1/24', 11: '192.168.1.1/24'}, 'protocols': {10: 'OSPF'}},
+        2: {'hostname': 'SW1', 'device': 'switch', 'interfaces': {11: 'FastEthernet0/1', 12: 'FastEthernet0/2'}},
+        3: {'hostname': 'PC1', 'device': 'pc', 'ip_address': '192.168.1.10', 'interfaces': {12: 'Ethernet0'}},
+        4: {'hostname': 'R2', 'device': 'router', 'interfaces': {13: 'GigabitEthernet0/0'},
+            'ip_addresses': {13: '10.0.0.2/24'}},
+    }
+    linkedEquipments = {11: (1, 2), 12: (2, 3)}
+    linksMap = {12: {'class': 'vlan', 'text': '20'}}
+    return TopologyGraph.from_extraction(zoneLinkText, linkedEquipments, linksMap)
+
+
+def test_string_table():
+    strings = StringTable()
+    assert strings.intern('R1') == strings.intern('R1') == 0
+    assert strings.intern(None) == -1 and strings[-1] is None
+    assert strings.find('R2') == -1 and strings[0] == 'R1' and len(strings) == 1
+
+
+def test_parse_interface():
+    assert str(parse_interface('10.0.0.1/30').network) == '10.0.0.0/30'
+    # Without a mask, the mask of the router template
+    assert str(parse_interface('10.0.0.1').network) == '10.0.0.0/24'
+    assert parse_interface('GigabitEthernet0/0') is None and parse_interface(None) is None
+
+
+def test_nodes_and_ports():
+    graph = extraction()
+    assert len(graph) == 4
+    r1 = graph.node(1)
+    assert graph.node_by_hostname('R1') == r1 and graph.node('missing') is None
+    assert (graph.hostname(r1), graph.device(r1), graph.address(r1)) == ('R1', 'router', '10.0.0.1/24')
+    assert [graph.port_name(port) for port in graph.ports(r1)] == ['GigabitEthernet0/0', 'GigabitEthernet0/1']
+    assert graph.port(graph.find_port(r1, 'GigabitEthernet0/0')) == {
+        'node': r1, 'link': 10, 'name': 'GigabitEthernet0/0', 'address': '10.0.0.1/24', 'protocol': 'OSPF', 'vlan': None}
+    assert graph.find_port(r1, 'Serial0/0/0') is None
+    # The vlan of a link comes from its classified text
+    assert graph.port(graph.find_port(graph.node(3), 'Ethernet0'))['vlan'] == '20'
+
+
+def test_adjacency_and_paths():
+    graph = extraction()
+    r1, sw1, pc1, r2 = (graph.node(key) for key in (1, 2, 3, 4))
+    assert sorted(graph.neighbors(sw1)) == [r1, pc1]
+    assert sorted(graph.links(sw1)) == [(11, r1), (12, pc1)]
+    assert graph.are_connected(r1, pc1) and not graph.are_connected(r1, r2)
+    assert graph.path(r1, pc1) == [r1, sw1, pc1]
+    assert graph.path(pc1, pc1) == [pc1]
+    assert graph.path(r1, r2) is None
+
+
+def test_subnets():
+    graph = extraction()
+    r1, pc1, r2 = graph.node(1), graph.node(3), graph.node(4)
+    r1Lan = graph.find_port(r1, 'GigabitEthernet0/0')
+    assert sorted(graph.subnet_nodes('10.0.0.0/24')) == [r1, r2]
+    # The address of the pc is an address of the node, not of a port
+    assert sorted(graph.subnet_nodes('192.168.1.0/24')) == [r1, pc1]
+    assert [graph.port_node(port) for port in graph.subnet_ports('192.168.1.0/24')] == [r1]
+    assert [graph.port_node(port) for port in graph.subnet_peers(r1Lan)] == [r2]
+    assert graph.subnet_peers(graph.find_port(graph.node(2), 'FastEthernet0/1')) == []
+
+
+def test_from_nodes_adds_no_edges():
+    nodes = {f"H{i}": {'device_type': 'pc', 'interfaces': {'Ethernet0': {'ip': f"10.0.{i // 250}.{i % 250 + 1}/16"}}}
+             for i in range(500)}
+    nodes['R1'] = {'device_type': 'router', 'interfaces': [{'name': 'Gi0/0', 'ip': '10.0.0.254/16'}, 'broken']}
+    graph = TopologyGraph.from_nodes(nodes)
+    assert len(graph) == 501 and len(graph.edgeKeys) == 0
+    assert len(graph.subnet_nodes('10.0.0.0/16')) == 501
+    router = graph.node('R1')
+    assert len(graph.subnet_peers(graph.find_port(router, 'Gi0/0'))) == 500